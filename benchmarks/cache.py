@@ -0,0 +1,112 @@
+"""Compare cache backends under concurrent load from several processes.
+
+    python -m benchmarks.cache --processes 1 4 8 --ops 20000
+
+Every process reads keys picked with a Zipf distribution, fills
+misses with a rendered-fragment-sized value and bumps a shared counter now
+and then, like post cards and version keys do. The hit rate shows how much
+the processes share: LocMemCache gives every process its own copy.
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from yatube.cache import SQLiteCache
+
+
+def create_backend(name, directory, max_entries):
+    params = {'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    if name == 'locmem':
+        return LocMemCache(name, params)
+    if name == 'filebased':
+        return FileBasedCache(os.path.join(directory, 'filebased'), params)
+    return SQLiteCache(os.path.join(directory, 'cache.sqlite3'), params)
+
+
+def work(name, directory, options, seed, results):
+    cache = create_backend(name, directory, options.max_entries)
+    generator = random.Random(seed)
+    keys = [f'post_item:{number}' for number in range(options.keys)]
+    weights = list(itertools.accumulate(
+        1 / rank for rank in range(1, options.keys + 1)
+    ))
+    value = 'x' * options.value_size
+    hits = 0
+    latencies = []
+    started = time.perf_counter()
+    for key in generator.choices(keys, cum_weights=weights, k=options.ops):
+        begin = time.perf_counter()
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache.set(key, value)
+        if generator.random() < options.incr_ratio:
+            if not cache.add('version', 1):
+                cache.incr('version')
+        latencies.append(time.perf_counter() - begin)
+    results.put((time.perf_counter() - started, hits, latencies))
+
+
+def run(name, processes, options):
+    directory = tempfile.mkdtemp()
+    try:
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        workers = [
+            context.Process(target=work,
+                            args=(name, directory, options, seed, results))
+            for seed in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        finished = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    elapsed = max(seconds for seconds, _, _ in finished)
+    latencies = sorted(latency for _, _, part in finished for latency in part)
+    return {
+        'ops_per_second': len(latencies) / elapsed,
+        'hit_rate': sum(hits for _, hits, _ in finished) / len(latencies),
+        'p50_us': latencies[len(latencies) // 2] * 1e6,
+        'p99_us': latencies[int(len(latencies) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+',
+                        default=['locmem', 'filebased', 'sqlite'],
+                        choices=['locmem', 'filebased', 'sqlite'])
+    parser.add_argument('--processes', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--ops', type=int, default=10000,
+                        help='operations per process')
+    parser.add_argument('--keys', type=int, default=2000)
+    parser.add_argument('--max-entries', type=int, default=1000)
+    parser.add_argument('--value-size', type=int, default=2048)
+    parser.add_argument('--incr-ratio', type=float, default=0.01)
+    options = parser.parse_args()
+
+    print(f'{"backend":<10} {"procs":>5} {"ops/s":>10} {"hit rate":>9} '
+          f'{"p50 us":>8} {"p99 us":>8}')
+    for processes in options.processes:
+        for name in options.backends:
+            result = run(name, processes, options)
+            print(f'{name:<10} {processes:>5} '
+                  f'{result["ops_per_second"]:>10.0f} '
+                  f'{result["hit_rate"]:>9.1%} '
+                  f'{result["p50_us"]:>8.1f} {result["p99_us"]:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
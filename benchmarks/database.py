@@ -0,0 +1,154 @@
+"""Concurrent read/write throughput of SQLite with and without the
+production profile of yatube/settings_prod.py.
+
+    python -m benchmarks.database --readers 4 --writers 2 --seconds 5
+
+Readers run the index page query, writers add a comment and bump the
+post's counter in one transaction, like add_comment does. The "default"
+profile reconnects for every request and keeps SQLite's defaults
+(CONN_MAX_AGE=0), "production" keeps one connection per process with
+SQLITE_PRAGMAS applied.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from yatube.db import apply_pragmas
+from yatube.settings_prod import SQLITE_PRAGMAS
+
+SCHEMA = '''
+CREATE TABLE user (id INTEGER PRIMARY KEY, username TEXT);
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY, text TEXT, pub_date REAL, author_id INTEGER,
+    comments_count INTEGER DEFAULT 0
+);
+CREATE INDEX post_pub_date ON post (pub_date);
+CREATE TABLE comment (
+    id INTEGER PRIMARY KEY, post_id INTEGER, author_id INTEGER, text TEXT
+);
+'''
+
+READ = '''
+SELECT post.id, post.text, post.comments_count, user.username
+FROM post JOIN user ON user.id = post.author_id
+ORDER BY post.pub_date DESC LIMIT 10 OFFSET ?
+'''
+
+PROFILES = {
+    'default': {'persistent': False, 'pragmas': {}},
+    'production': {'persistent': True, 'pragmas': SQLITE_PRAGMAS},
+}
+
+
+def create_database(path, posts):
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.executemany('INSERT INTO user VALUES (?, ?)',
+                           [(pk, f'user{pk}') for pk in range(100)])
+    connection.executemany(
+        'INSERT INTO post (text, pub_date, author_id) VALUES (?, ?, ?)',
+        [('x' * 400, pk, pk % 100) for pk in range(posts)],
+    )
+    connection.commit()
+    connection.close()
+
+
+def connect(path, profile):
+    # Django's sqlite3 backend waits 5 seconds for a lock by default.
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    apply_pragmas(connection.cursor(), profile['pragmas'])
+    return connection
+
+
+def read(connection, number):
+    connection.execute(READ, (number % 100 * 10,)).fetchall()
+
+
+def write(connection, number):
+    post_id = number % 1000 + 1
+    connection.execute('BEGIN')
+    connection.execute(
+        'INSERT INTO comment (post_id, author_id, text) VALUES (?, ?, ?)',
+        (post_id, number % 100, 'Комментарий'),
+    )
+    connection.execute(
+        'UPDATE post SET comments_count = comments_count + 1 WHERE id = ?',
+        (post_id,),
+    )
+    connection.execute('COMMIT')
+
+
+def work(path, profile, action, deadline, results):
+    operation = read if action == 'read' else write
+    connection = connect(path, profile) if profile['persistent'] else None
+    done = errors = 0
+    while time.time() < deadline:
+        current = connection or connect(path, profile)
+        try:
+            operation(current, done)
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if current.in_transaction:
+                current.execute('ROLLBACK')
+        finally:
+            if current is not connection:
+                current.close()
+    results.put((action, done, errors))
+
+
+def run(name, options):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'db.sqlite3')
+    profile = PROFILES[name]
+    try:
+        create_database(path, options.posts)
+        # journal_mode is stored in the file, set it before the workers start.
+        connect(path, profile).close()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        deadline = time.time() + options.seconds
+        actions = (['read'] * options.readers
+                   + ['write'] * options.writers)
+        workers = [
+            context.Process(target=work,
+                            args=(path, profile, action, deadline, results))
+            for action in actions
+        ]
+        for worker in workers:
+            worker.start()
+        finished = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    totals = {'read': 0, 'write': 0, 'errors': 0}
+    for action, done, errors in finished:
+        totals[action] += done
+        totals['errors'] += errors
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--posts', type=int, default=10000)
+    options = parser.parse_args()
+
+    print(f'{"profile":<12} {"reads/s":>10} {"writes/s":>10} {"errors":>7}')
+    for name in PROFILES:
+        totals = run(name, options)
+        print(f'{name:<12} {totals["read"] / options.seconds:>10.0f} '
+              f'{totals["write"] / options.seconds:>10.0f} '
+              f'{totals["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
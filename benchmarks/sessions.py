@@ -0,0 +1,98 @@
+"""Queries and latency of an authenticated index request with database
+sessions and with the cached session and user layer of users/.
+
+    python -m benchmarks.sessions --requests 200
+
+Runs against BENCHMARK_DB, filled with a small `generate_data` set.
+"""
+import argparse
+import os
+import statistics
+import time
+from io import StringIO
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks.views import reset_database  # noqa: E402
+from posts.models import User  # noqa: E402
+
+CACHED_AUTH = 'users.auth.CachedAuthenticationMiddleware'
+
+PROFILES = {
+    'database': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'MIDDLEWARE': [
+            'django.contrib.auth.middleware.AuthenticationMiddleware'
+            if name == CACHED_AUTH else name
+            for name in settings.MIDDLEWARE
+        ],
+    },
+    'cached': {
+        'SESSION_ENGINE': settings.SESSION_ENGINE,
+        'MIDDLEWARE': settings.MIDDLEWARE,
+    },
+}
+
+
+def run(profile, user, requests):
+    with override_settings(**profile):
+        cache.clear()
+        client = Client()
+        client.force_login(user)
+        url = reverse('posts:index')
+        client.get(url)
+        counts = []
+        auth_counts = []
+        latencies = []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                client.get(url)
+                latencies.append(time.perf_counter() - started)
+            counts.append(len(queries))
+            auth_counts.append(sum(
+                'FROM "django_session"' in query['sql']
+                or 'FROM "auth_user"' in query['sql']
+                for query in queries
+            ))
+
+    return {
+        'queries': statistics.mean(counts),
+        'auth_queries': statistics.mean(auth_counts),
+        'p50_ms': statistics.median(latencies) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    options = parser.parse_args()
+
+    reset_database()
+    call_command('generate_data', users=100, groups=5, follows=10,
+                 posts=2000, comments=1000, seed=1, stdout=StringIO())
+    user = User.objects.order_by('pk').first()
+
+    print(f'{"profile":<10} {"queries":>8} {"session+user":>13} {"p50":>10}')
+    for name, profile in PROFILES.items():
+        result = run(profile, user, options.requests)
+        print(f'{name:<10} {result["queries"]:>8.1f} '
+              f'{result["auth_queries"]:>13.1f} '
+              f'{result["p50_ms"]:>7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+from yatube.settings import *  # noqa: F401,F403
+from yatube.settings import DATABASES
+
+DEBUG = False
+
+DATABASES['default']['NAME'] = os.environ.get(
+    'BENCHMARK_DB', os.path.join(tempfile.gettempdir(), 'yatube-bench.sqlite3')
+)
+
+THUMBNAIL_WORKERS = 0
+
+# The default 300 entries would not hold the fragments and versions of one
+# 100-post page.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
@@ -0,0 +1,107 @@
+"""Render time of index.html with and without the cached template loader.
+
+    python -m benchmarks.templates --per-page 10 100 --renders 200
+
+Posts are built in memory, no database is needed. "default" re-reads
+and re-parses every template on each render, as the loaders do with
+DEBUG on, "cached" is what Django 2.2 uses with DEBUG off, as in
+yatube/settings_prod.py.
+Each is measured with the post card fragment cache empty ("cold") and
+filled ("warm").
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.paginator import Paginator  # noqa: E402
+from django.template.backends.django import DjangoTemplates  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from posts.models import Group, Post, User  # noqa: E402
+from posts.synthetic import WORDS  # noqa: E402
+
+DEFAULT_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+LOADERS = {
+    'default': DEFAULT_LOADERS,
+    'cached': [('django.template.loaders.cached.Loader', DEFAULT_LOADERS)],
+}
+
+
+def backend(loaders):
+    options = dict(settings.TEMPLATES[0]['OPTIONS'], loaders=loaders)
+    return DjangoTemplates({
+        'NAME': 'benchmark',
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+def make_posts(count):
+    group = Group(pk=1, title='Группа', slug='group')
+    now = timezone.now()
+    posts = []
+    for number in range(1, count + 1):
+        author = User(pk=number, username=f'user{number}')
+        posts.append(Post(
+            pk=number, text=' '.join(WORDS[:number % len(WORDS) + 10]),
+            author=author, group=group if number % 2 else None,
+            pub_date=now, comments_count=number % 3,
+        ))
+
+    return posts
+
+
+def render_times(templates, per_page, renders, warm):
+    paginator = Paginator(make_posts(per_page * 10), per_page)
+    context = {'page': paginator.page(1), 'paginator': paginator}
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    times = []
+    for _ in range(renders):
+        if not warm:
+            cache.clear()
+        started = time.perf_counter()
+        templates.get_template('index.html').render(context, request)
+        times.append(time.perf_counter() - started)
+
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--per-page', nargs='+', type=int, default=[10, 100])
+    parser.add_argument('--renders', type=int, default=200)
+    options = parser.parse_args()
+
+    print(f'{"loaders":<8} {"posts":>5} {"fragments":<9} '
+          f'{"median":>10} {"p95":>10}')
+    for name, loaders in LOADERS.items():
+        templates = backend(loaders)
+        for per_page in options.per_page:
+            for warm in (False, True):
+                times = sorted(render_times(templates, per_page,
+                                            options.renders, warm))
+                print(f'{name:<8} {per_page:>5} '
+                      f'{"warm" if warm else "cold":<9} '
+                      f'{statistics.median(times) * 1000:>7.2f} ms '
+                      f'{times[int(len(times) * 0.95)] * 1000:>7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
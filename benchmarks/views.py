@@ -0,0 +1,216 @@
+"""Latency percentiles and query counts of every posts route at several
+data set sizes.
+
+    python -m benchmarks.views --sizes 1000 10000 100000 \\
+        --output views.json --compare previous.json
+
+The database (BENCHMARK_DB, a temporary file by default) is rebuilt and
+grown with `generate_data` up to each size in turn. Every route is
+requested once with an empty cache ("cold") and then --requests times.
+Results are written as JSON; with --compare, routes whose p95 latency or
+query count grew against an earlier run are listed and the exit status
+is 1.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from io import StringIO
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from posts.models import Follow, Group, User  # noqa: E402
+from posts.urls import app_name, urlpatterns  # noqa: E402
+
+# Error handler views, not pages.
+SKIPPED_ROUTES = {'404', '500'}
+
+# Requested by the post's author, everything else by a busy reader.
+AUTHOR_ROUTES = {'post_edit'}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def reset_database():
+    path = settings.DATABASES['default']['NAME']
+    connection.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    call_command('migrate', verbosity=0)
+
+
+def grow(posts, added_posts):
+    """Grow the data set by `added_posts` posts and matching users."""
+    call_command(
+        'generate_data',
+        users=max(added_posts // 50, 10),
+        groups=max(added_posts // 2000, 1),
+        follows=20,
+        posts=added_posts,
+        comments=added_posts // 2,
+        seed=posts,
+        stdout=StringIO(),
+    )
+
+
+def route_kwargs():
+    """Pick a busy reader, an author, their post and a group."""
+    reader = User.objects.annotate(count=Count('follower'))\
+                         .order_by('-count').first()
+    author = User.objects.annotate(count=Count('posts'))\
+                         .order_by('-count').first()
+    post = author.posts.order_by('-comments_count').first()
+    group = Group.objects.annotate(count=Count('posts'))\
+                         .order_by('-count').first()
+    followed = Follow.objects.filter(user=reader).first()
+
+    return reader, author, {
+        'username': author.username,
+        'post_id': post.pk,
+        'slug': group.slug,
+        'followed': followed.author.username if followed else author.username,
+    }
+
+
+def route_url(pattern, arguments):
+    names = set(pattern.pattern.converters)
+    kwargs = {name: arguments[name] for name in names}
+    if pattern.name in ('profile_follow', 'profile_unfollow'):
+        kwargs['username'] = arguments['followed']
+    url = reverse(f'{app_name}:{pattern.name}', kwargs=kwargs)
+    if pattern.name == 'search':
+        url += '?q=кот'
+
+    return url
+
+
+def measure(client, url, requests):
+    cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        status = client.get(url).status_code
+        cold = time.perf_counter() - started
+    cold_queries = len(queries)
+    latencies = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - started)
+
+    return {
+        'url': url,
+        'status': status,
+        'cold_ms': cold * 1000,
+        'cold_queries': cold_queries,
+        'queries': len(queries),
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def run(sizes, requests):
+    reset_database()
+    results = []
+    posts = 0
+    for size in sorted(sizes):
+        grow(size, size - posts)
+        posts = size
+        reader, author, arguments = route_kwargs()
+        reader_client, author_client = Client(), Client()
+        reader_client.force_login(reader)
+        author_client.force_login(author)
+        for pattern in urlpatterns:
+            if pattern.name in SKIPPED_ROUTES:
+                continue
+            client = author_client if pattern.name in AUTHOR_ROUTES \
+                else reader_client
+            result = measure(client, route_url(pattern, arguments), requests)
+            result.update(size=size, route=pattern.name)
+            results.append(result)
+            print(f'{size:>8} {pattern.name:<18} {result["status"]:>4} '
+                  f'{result["queries"]:>3}q {result["cold_queries"]:>3}q '
+                  f'p50 {result["p50_ms"]:7.1f} ms  '
+                  f'p95 {result["p95_ms"]:7.1f} ms  '
+                  f'cold {result["cold_ms"]:7.1f} ms')
+
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(results, previous, tolerance):
+    before = {(item['size'], item['route']): item
+              for item in previous['results']}
+    for item in results:
+        old = before.get((item['size'], item['route']))
+        if old is None:
+            continue
+        if item['queries'] > old['queries'] \
+                or item['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            yield item, old
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[1000, 10000], help='numbers of posts')
+    parser.add_argument('--requests', type=int, default=20,
+                        help='warm requests per route')
+    parser.add_argument('--output', help='JSON file to write results to')
+    parser.add_argument('--compare', help='JSON file of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative p95 growth for --compare')
+    options = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'date': datetime.now(timezone.utc).isoformat(),
+        'requests': options.requests,
+        'results': run(options.sizes, options.requests),
+    }
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+    if options.compare:
+        with open(options.compare) as previous:
+            found = list(regressions(report['results'], json.load(previous),
+                                     options.tolerance))
+        for item, old in found:
+            print(f'REGRESSION {item["size"]} {item["route"]}: '
+                  f'p95 {old["p95_ms"]:.1f} -> {item["p95_ms"]:.1f} ms, '
+                  f'queries {old["queries"]} -> {item["queries"]}')
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    # The same as yatube.test_runner.TestRunner for the pytest suite.
+    settings.QUERY_BUDGET_STRICT = True
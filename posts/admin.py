@@ -1,14 +1,18 @@
 from django.contrib import admin
 
-from .models import Group, Post, Comment
+from .models import Group, Post, Comment, SlowQuery
+from .search import filter_posts
 
 
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('text', 'pub_date', 'author')
+    list_display = ('text', 'pub_date', 'author', 'comments_count')
     search_fields = ('text',)
     list_filter = ('pub_date', 'author')
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        return filter_posts(queryset, search_term), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'author', 'text', 'created')
@@ -17,6 +21,24 @@ class CommentAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('sql', 'count', 'total_time', 'mean_time', 'max_time',
+                    'view', 'template', 'last_seen')
+    search_fields = ('sql',)
+    list_filter = ('view',)
+    readonly_fields = ('sql', 'params', 'count', 'total_time', 'max_time',
+                       'view', 'location', 'template', 'plan', 'last_seen')
+    exclude = ('fingerprint',)
+
+    def mean_time(self, obj):
+        return obj.total_time / obj.count if obj.count else None
+    mean_time.short_description = 'Среднее время, с'
+
+    def has_add_permission(self, request):
+        return False
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -0,0 +1,253 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from yatube.db import synced_replicas
+
+from .models import Group, Post, User
+
+
+def _version_key(kind, pk):
+    return f'version:{kind}:{pk}'
+
+
+def _initial_version():
+    # Versions start from the clock, so a version key that was evicted
+    # never comes back with a value some stale fragment is stored under.
+    return time.time_ns() // 1000
+
+
+def _again_on_commit(function, *args):
+    # A request reading between the write and its commit would keep the
+    # old rows under the new version or watermark. Moving it once more
+    # after the commit leaves what it cached behind.
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: function(*args))
+
+
+def _bump_version(kind, pk):
+    key = _version_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def bump_version(kind, pk):
+    """Invalidate everything cached under the version of `(kind, pk)`."""
+    _bump_version(kind, pk)
+    _again_on_commit(_bump_version, kind, pk)
+
+
+def _get_versions(objects):
+    keys = {_version_key(kind, pk) for kind, pk in objects}
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+
+    return versions
+
+
+def get_versions(*objects):
+    """Return the current versions of `(kind, pk)` pairs as one string."""
+    versions = _get_versions(objects)
+    return '.'.join(str(versions[_version_key(kind, pk)])
+                    for kind, pk in objects)
+
+
+def _post_objects(post):
+    objects = [('post', post.pk), ('user', post.author_id)]
+    if post.group_id is not None:
+        objects.append(('group', post.group_id))
+
+    return objects
+
+
+def post_version(post):
+    """Version of everything a rendered post card depends on."""
+    return get_versions(*_post_objects(post))
+
+
+def post_versions(posts):
+    """`post_version` of every post by pk, in one cache round trip."""
+    objects = {post.pk: _post_objects(post) for post in posts}
+    versions = _get_versions(
+        [item for items in objects.values() for item in items])
+
+    return {
+        pk: '.'.join(str(versions[_version_key(kind, key)])
+                     for kind, key in items)
+        for pk, items in objects.items()
+    }
+
+
+# Querysets cached objects are read from. Authors only need what a post
+# card shows, groups are kept by posts.groups.group_registry.
+OBJECT_SOURCES = {
+    'post': Post.objects.all(),
+    'user': User.objects.only('id', 'username', 'first_name', 'last_name'),
+}
+
+
+def _object_key(kind, pk, version):
+    return f'object:{kind}:{pk}:{version}'
+
+
+def get_objects(objects):
+    """Return `{(kind, pk): object}` for `(kind, pk)` pairs.
+
+    Objects are cached under their version, so saving or deleting one
+    (see `bump_version`) makes the next read go to the database. Missing
+    objects are left out.
+    """
+    objects = set(objects)
+    versions = _get_versions(objects)
+    keys = {
+        _object_key(kind, pk, versions[_version_key(kind, pk)]): (kind, pk)
+        for kind, pk in objects
+    }
+    found = {keys[key]: obj for key, obj in cache.get_many(keys).items()}
+    missing = {}
+    for kind, pk in objects - found.keys():
+        missing.setdefault(kind, []).append(pk)
+    loaded = {}
+    for kind, pks in missing.items():
+        for pk, obj in OBJECT_SOURCES[kind].in_bulk(pks).items():
+            loaded[kind, pk] = obj
+    if loaded:
+        cache.set_many(
+            {key: loaded[item] for key, item in keys.items()
+             if item in loaded},
+            settings.OBJECT_CACHE_TIMEOUT,
+        )
+    found.update(loaded)
+
+    return found
+
+
+def _watermark_key(scope):
+    return f'modified:{scope}'
+
+
+def _touch(scopes):
+    now = time.time()
+    cache.set_many({_watermark_key(scope): now for scope in scopes}, None)
+
+
+def touch(*scopes):
+    """Move the "last modified" watermarks of the given scopes to now.
+
+    Inside a transaction they are moved again once it commits.
+    """
+    _touch(scopes)
+    _again_on_commit(_touch, scopes)
+
+
+def get_watermarks(*scopes):
+    """Return the watermarks of the given scopes, starting missing ones."""
+    keys = [_watermark_key(scope) for scope in scopes]
+    watermarks = cache.get_many(keys)
+    for key in keys:
+        if key not in watermarks:
+            cache.add(key, time.time(), None)
+            watermarks[key] = cache.get(key)
+
+    return [watermarks[key] for key in keys]
+
+
+def request_watermarks(request, *scopes):
+    """`get_watermarks` of `'site'` and `scopes`, read once per request."""
+    scopes = ('site',) + scopes
+    memo = request.__dict__.setdefault('_watermarks', {})
+    if scopes not in memo:
+        memo[scopes] = get_watermarks(*scopes)
+
+    return memo[scopes]
+
+
+def is_settled(watermarks):
+    """Whether every replica read from holds the writes of `watermarks`.
+
+    A replica copied before the latest write may be missing it, whatever
+    time has passed since.
+    """
+    return all(started >= max(watermarks)
+               for started in synced_replicas().values())
+
+
+def touch_post(post, *group_ids):
+    """Touch every page that shows the post.
+
+    `group_ids` are extra groups the post has just been moved out of.
+    """
+    scopes = ['posts', f'post:{post.pk}', f'profile:{post.author.username}']
+    group_ids = {post.group_id, *group_ids} - {None}
+    if group_ids:
+        slugs = Group.objects.filter(pk__in=group_ids)\
+                             .values_list('slug', flat=True)
+        scopes.extend(f'group:{slug}' for slug in slugs)
+    touch(*scopes)
+
+
+def _is_fresh(entry, version):
+    _, built_from, _, expires = entry
+    return built_from == version and time.time() < expires
+
+
+def _should_rebuild(entry, version, beta):
+    # XFetch: the closer the expiry and the longer the last rebuild took,
+    # the likelier a reader rebuilds early, before readers pile up on it.
+    _, built_from, delta, expires = entry
+    if built_from != version:
+        return True
+    return time.time() - delta * beta * math.log(1 - random.random()) \
+        >= expires
+
+
+def _build(key, compute, timeout, version):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    entry = (value, version, delta, time.time() + timeout)
+    cache.set(key, entry, timeout + settings.FEED_CACHE_STALE_SECONDS)
+
+    return value
+
+
+def fetch(key, compute, timeout, version=None, allow_stale=True):
+    """Return `(value, fresh)` of `compute()` cached under `key`.
+
+    Only one process at a time rebuilds an entry. While it does, the
+    others get the previous value, built for an older `version` or past
+    its `timeout`, if there is one and `allow_stale`, and wait for the
+    rebuild otherwise. `fresh` is False when a stale value is returned.
+    """
+    entry = cache.get(key)
+    if entry is not None \
+            and not _should_rebuild(entry, version, settings.FEED_CACHE_BETA):
+        return entry[0], True
+
+    lock_key = f'{key}:lock'
+    lock_timeout = settings.FEED_CACHE_LOCK_SECONDS
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            return _build(key, compute, timeout, version), True
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None and (allow_stale or entry[1] == version):
+        return entry[0], _is_fresh(entry, version)
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        entry = cache.get(key)
+        if entry is not None and entry[1] == version:
+            return entry[0], True
+    # The process holding the lock is gone, rebuild here.
+    return _build(key, compute, timeout, version), True
@@ -0,0 +1,154 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .cache import bump_version
+from .models import Comment, Follow, Post, User, UserStats
+
+USER_STATS_FIELDS = ('followers_count', 'following_count', 'posts_count')
+
+
+def comments_count_subquery():
+    comments = Comment.objects.filter(post=OuterRef('pk'))\
+                              .order_by()\
+                              .values('post')\
+                              .annotate(count=Count('pk'))\
+                              .values('count')
+    return Coalesce(Subquery(comments, output_field=IntegerField()), 0)
+
+
+def comment_added(comment):
+    Post.objects.filter(pk=comment.post_id)\
+                .update(comments_count=F('comments_count') + 1)
+
+
+def comment_removed(comment):
+    Post.objects.filter(pk=comment.post_id, comments_count__gt=0)\
+                .update(comments_count=F('comments_count') - 1)
+
+
+def reconcile_comments_count(batch_size=1000):
+    """Fix drifted `Post.comments_count` values batch by batch.
+
+    Yields the number of repaired posts for every processed batch.
+    """
+    last_pk = None
+    while True:
+        posts = Post.objects.order_by('pk')
+        if last_pk is not None:
+            posts = posts.filter(pk__gt=last_pk)
+        batch = list(
+            posts.annotate(actual=Count('comments'))
+                 .values_list('pk', 'comments_count', 'actual')[:batch_size]
+        )
+        if not batch:
+            return
+        last_pk = batch[-1][0]
+        drifted = [pk for pk, stored, actual in batch if stored != actual]
+        if drifted:
+            with transaction.atomic():
+                Post.objects.filter(pk__in=drifted)\
+                    .update(comments_count=comments_count_subquery())
+            for pk in drifted:
+                bump_version('post', pk)
+        yield len(drifted)
+
+
+def actual_user_stats(user_ids):
+    """Count followers, followings and posts of users from the tables."""
+    stats = {pk: dict.fromkeys(USER_STATS_FIELDS, 0) for pk in user_ids}
+    sources = (
+        ('followers_count', Follow.objects.filter(author_id__in=user_ids),
+         'author_id'),
+        ('following_count', Follow.objects.filter(user_id__in=user_ids),
+         'user_id'),
+        ('posts_count', Post.objects.filter(author_id__in=user_ids),
+         'author_id'),
+    )
+    for field, queryset, column in sources:
+        counts = queryset.order_by().values_list(column)\
+                                    .annotate(count=Count('pk'))
+        for pk, count in counts:
+            stats[pk][field] = count
+
+    return stats
+
+
+def user_stats(user):
+    """Return the stats row of a user, creating it if it went missing."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        user.stats, _ = UserStats.objects.get_or_create(
+            user_id=user.pk, defaults=actual_user_stats([user.pk])[user.pk],
+        )
+        return user.stats
+
+
+def _increment(user_id, field):
+    updated = UserStats.objects.filter(user_id=user_id)\
+                               .update(**{field: F(field) + 1})
+    if not updated:
+        # The stored value already includes the change being counted.
+        UserStats.objects.get_or_create(
+            user_id=user_id, defaults=actual_user_stats([user_id])[user_id],
+        )
+
+
+def _decrement(user_id, field):
+    # Never creates the row: the user may be being deleted right now.
+    UserStats.objects.filter(user_id=user_id, **{f'{field}__gt': 0})\
+                     .update(**{field: F(field) - 1})
+
+
+def user_created(user):
+    UserStats.objects.get_or_create(user_id=user.pk)
+
+
+def follow_added(follow):
+    _increment(follow.author_id, 'followers_count')
+    _increment(follow.user_id, 'following_count')
+
+
+def follow_removed(follow):
+    _decrement(follow.author_id, 'followers_count')
+    _decrement(follow.user_id, 'following_count')
+
+
+def post_added(post):
+    _increment(post.author_id, 'posts_count')
+
+
+def post_removed(post):
+    _decrement(post.author_id, 'posts_count')
+
+
+def reconcile_user_stats(batch_size=1000):
+    """Create missing and fix drifted `UserStats` rows batch by batch.
+
+    Yields the number of repaired rows for every processed batch.
+    """
+    last_pk = None
+    while True:
+        users = User.objects.order_by('pk')
+        if last_pk is not None:
+            users = users.filter(pk__gt=last_pk)
+        user_ids = list(users.values_list('pk', flat=True)[:batch_size])
+        if not user_ids:
+            return
+        last_pk = user_ids[-1]
+        actual = actual_user_stats(user_ids)
+        stored = UserStats.objects.in_bulk(user_ids)
+        missing = [UserStats(user_id=pk, **actual[pk])
+                   for pk in user_ids if pk not in stored]
+        drifted = []
+        for pk, stats in stored.items():
+            if any(getattr(stats, field) != value
+                   for field, value in actual[pk].items()):
+                for field, value in actual[pk].items():
+                    setattr(stats, field, value)
+                drifted.append(stats)
+        with transaction.atomic():
+            UserStats.objects.bulk_create(missing, ignore_conflicts=True)
+            UserStats.objects.bulk_update(drifted, USER_STATS_FIELDS)
+        yield len(missing) + len(drifted)
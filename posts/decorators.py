@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import connections
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .cache import is_settled, request_watermarks
+
+logger = logging.getLogger(__name__)
+
+_uncounted = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """`execute_wrapper` hook counting executed statements by their SQL."""
+
+    def __init__(self):
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not getattr(_uncounted, 'depth', 0):
+            self.statements[sql] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    @property
+    def duplicates(self):
+        return {sql: count for sql, count in self.statements.items()
+                if count > 1}
+
+
+@contextmanager
+def uncounted():
+    """Leave the queries run inside out of every @query_budget.
+
+    For work that normally runs off the request path, e.g. thumbnails.
+    """
+    _uncounted.depth = getattr(_uncounted, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _uncounted.depth -= 1
+
+
+def _watermarks(request, scopes, kwargs):
+    return request_watermarks(
+        request, *(scope.format(**kwargs) for scope in scopes))
+
+
+def _is_personal(request):
+    return settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+def watermark_condition(*scopes):
+    """Answer conditional GETs from cached "last modified" watermarks.
+
+    `scopes` are formatted with the view kwargs, e.g. `'group:{slug}'`.
+    Nothing but the cache is touched before the 304 decision. Pages of
+    visitors with a session are personal, so their ETag also covers the
+    session and CSRF cookies. Stale pages (`request.stale`) get no ETag,
+    nor may they be stored. There is no Last-Modified: HTTP dates have
+    whole seconds, a write in the same second as the previous one would
+    leave the date as it was.
+    """
+    def etag(request, *args, **kwargs):
+        parts = [str(watermark)
+                 for watermark in _watermarks(request, scopes, kwargs)]
+        parts.append(request.get_full_path())
+        if _is_personal(request):
+            parts.append(request.COOKIES[settings.SESSION_COOKIE_NAME])
+            parts.append(request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+
+        return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+    conditional = condition(etag_func=etag)
+
+    def decorator(view):
+        view = conditional(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if getattr(request, 'stale', False):
+                # The ETag is of the current watermarks, the body is
+                # older: a cache keeping it would revalidate it.
+                del response['ETag']
+                patch_cache_control(response, no_cache=True)
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _is_anonymous(request):
+    # No session, no pending messages and no recent write of their own.
+    return not any(name in request.COOKIES for name in (
+        settings.SESSION_COOKIE_NAME,
+        CookieStorage.cookie_name,
+        settings.REPLICA_STICKY_COOKIE,
+    ))
+
+
+def anonymous_page_cache(*scopes):
+    """Cache whole pages of cookie-less visitors for `PAGE_CACHE_SECONDS`.
+
+    The key covers the URL and the watermarks of `scopes`, so a write
+    touching them moves every page it shows to a new key. Responses that
+    set a cookie or used the CSRF token are never cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or not _is_anonymous(request)):
+                return view(request, *args, **kwargs)
+
+            watermarks = _watermarks(request, scopes, kwargs)
+            parts = [request.get_full_path()]
+            parts.extend(str(watermark) for watermark in watermarks)
+            key = 'page:' + hashlib.md5('|'.join(parts).encode()).hexdigest()
+            response = cache.get(key)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            # A page built from a replica lagging behind the watermarks or
+            # from a stale feed must not be kept under their new key.
+            if (response.status_code == 200 and not response.streaming
+                    and not response.cookies and is_settled(watermarks)
+                    and not getattr(request, 'stale', False)
+                    and not request.META.get('CSRF_COOKIE_USED')):
+                cache.set(key, response, settings.PAGE_CACHE_SECONDS)
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def query_budget(limit):
+    """Count the queries of a view and report it going over `limit`.
+
+    Statements repeated with different parameters are reported as
+    duplicates, they are the usual sign of an N+1. With
+    `QUERY_BUDGET_STRICT` the view raises `QueryBudgetExceeded` instead.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                # Replicas included, the view may read from one of them.
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(counter))
+                response = view(request, *args, **kwargs)
+            duplicates = counter.duplicates
+            logger.debug('%s: %d queries, %d duplicated',
+                         request.path, counter.count, len(duplicates))
+            if counter.count > limit:
+                message = (f'{request.path}: {counter.count} queries, '
+                           f'budget {limit}')
+                for sql, count in duplicates.items():
+                    message += f'\n{count}x {sql}'
+                if settings.QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+
+            return response
+
+        wrapper.query_budget = limit
+        return wrapper
+
+    return decorator
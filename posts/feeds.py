@@ -0,0 +1,84 @@
+import hashlib
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import QuerySet
+
+from .cache import fetch, get_objects, is_settled, request_watermarks
+from .groups import attach_groups
+from .paginator import (
+    MAX_PAGE_NUMBER, POSTS_PER_PAGE, KeysetPage, elided_page_range,
+    encode_cursor, paginate,
+)
+
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def hydrate_posts(ids):
+    """Posts by `ids` with their authors and groups, in the same order.
+
+    A warm page costs two cache round trips for the posts, two for their
+    authors and one for the version of the groups. Deleted posts are
+    skipped.
+    """
+    found = get_objects(('post', pk) for pk in ids)
+    posts = [found['post', pk] for pk in ids if ('post', pk) in found]
+    authors = get_objects(('user', post.author_id) for post in posts)
+    hydrated = []
+    for post in posts:
+        if ('user', post.author_id) not in authors:
+            continue
+        post.author = authors['user', post.author_id]
+        hydrated.append(post)
+
+    return attach_groups(hydrated)
+
+
+def _numbered_page(feed, count, number, ids, per_page):
+    paginator = Paginator(feed, per_page)
+    paginator.count = count
+    page = Page(hydrate_posts(ids), number, paginator)
+    page.page_range = elided_page_range(page)
+    if page and page.has_next() and page.number >= MAX_PAGE_NUMBER:
+        page.next_cursor = encode_cursor(page[len(page) - 1])
+
+    return paginator, page
+
+
+def feed_page(request, feed, name, *scopes, per_page=POSTS_PER_PAGE):
+    """`paginate` a feed, keeping the ids of its pages in the cache.
+
+    A page is rebuilt once a write moves the watermarks of `scopes` or
+    after `FEED_CACHE_SECONDS`, by one process at a time: the others keep
+    showing the previous page meanwhile, except to visitors who have just
+    written something themselves. Such requests get `request.stale`.
+    Only ids and dates are read from the feed, the posts themselves come
+    from `hydrate_posts`.
+    """
+    watermarks = request_watermarks(request, *scopes)
+    params = '|'.join(request.GET.get(param, '') for param in PAGE_PARAMS)
+    key = f'feed:{name}:' + hashlib.md5(params.encode()).hexdigest()
+    if isinstance(feed, QuerySet):
+        feed = feed.only('pk', 'pub_date')
+
+    def compute():
+        paginator, page = paginate(request, feed, per_page)
+        ids = [post.pk for post in page]
+        if paginator is None:
+            return None, None, ids, page.has_next(), page.has_previous()
+        return paginator.count, page.number, ids, None, None
+
+    # Until the replicas catch up with the watermarks a page read from one
+    # may miss the latest write, so it is rebuilt on every request.
+    timeout = settings.FEED_CACHE_SECONDS if is_settled(watermarks) else 0
+    entry, fresh = fetch(
+        key, compute, timeout, '.'.join(map(str, watermarks)),
+        allow_stale=settings.REPLICA_STICKY_COOKIE not in request.COOKIES,
+    )
+    if not fresh:
+        request.stale = True
+
+    count, number, ids, has_next, has_previous = entry
+    if count is None:
+        return None, KeysetPage(hydrate_posts(ids), has_next, has_previous)
+    return _numbered_page(feed, count, number, ids, per_page)
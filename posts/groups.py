@@ -0,0 +1,65 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from .cache import bump_version, get_versions
+from .models import Group, Post
+
+# Version of the whole table, moved by every save or delete of a group.
+VERSION = ('groups', 'all')
+
+
+class GroupRegistry:
+    """Every group, loaded once per process and indexed by id and slug.
+
+    The table is reloaded when its cross-process version moves, see
+    `changed`. Groups are shared between requests and must not be changed.
+    """
+
+    def __init__(self):
+        self._state = (None, {}, {})
+
+    def _load(self):
+        version = get_versions(VERSION)
+        state = self._state
+        if state[0] != version:
+            # From the primary, a lagging replica would be kept until the
+            # next change.
+            groups = list(Group.objects.using(DEFAULT_DB_ALIAS))
+            state = (
+                version,
+                {group.pk: group for group in groups},
+                {group.slug: group for group in groups},
+            )
+            # Swapped at once, threads never see half a table.
+            self._state = state
+
+        return state
+
+    def by_id(self):
+        return self._load()[1]
+
+    def get(self, pk):
+        return self.by_id().get(pk)
+
+    def get_by_slug(self, slug):
+        return self._load()[2].get(slug)
+
+    def changed(self):
+        # Bumped again after commit, see bump_version().
+        bump_version(*VERSION)
+
+
+group_registry = GroupRegistry()
+
+
+def attach_groups(posts):
+    """Set `post.group` from the registry where it is not loaded yet."""
+    field = Post._meta.get_field('group')
+    groups = None
+    for post in posts:
+        if post.group_id is None or field.is_cached(post):
+            continue
+        if groups is None:
+            groups = group_registry.by_id()
+        post.group = groups.get(post.group_id)
+
+    return posts
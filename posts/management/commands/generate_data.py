@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from posts.synthetic import generate
+
+STAGES = {
+    'users': 'Пользователей',
+    'groups': 'Групп',
+    'follows': 'Подписок',
+    'posts': 'Постов',
+    'comments': 'Комментариев',
+    'timeline': 'Записей в лентах',
+    'comments_count': 'Исправлено счетчиков комментариев',
+    'user_stats': 'Исправлено счетчиков пользователей',
+}
+
+
+class Command(BaseCommand):
+    help = 'Добавляет в базу синтетические данные для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее количество подписок пользователя',
+        )
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить публикации',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество записей в одном bulk_create',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        stages = generate(
+            users=options['users'],
+            groups=options['groups'],
+            follows=options['follows'],
+            posts=options['posts'],
+            comments=options['comments'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            days=options['days'],
+        )
+        for stage, count in stages:
+            self.stdout.write(f'{STAGES[stage]}: {count}')
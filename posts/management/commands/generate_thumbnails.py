@@ -0,0 +1,46 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import create_executor, generate
+
+
+class Command(BaseCommand):
+    help = 'Создает миниатюры для всех изображений постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов, 0 - без дополнительных процессов',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50,
+            help='Количество изображений, передаваемых процессу за раз',
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='')\
+                            .exclude(image__isnull=True)\
+                            .values_list('image', flat=True)\
+                            .iterator()
+        if options['workers']:
+            with create_executor(options['workers']) as executor:
+                errors = self.report(executor.map(
+                    generate, names, chunksize=options['chunk_size'],
+                ))
+        else:
+            errors = self.report(map(generate, names))
+        if errors:
+            self.stderr.write(f'Ошибок: {errors}')
+
+    def report(self, results):
+        done = errors = 0
+        for error in results:
+            done += 1
+            if error:
+                errors += 1
+                self.stderr.write(error)
+        self.stdout.write(f'Обработано изображений: {done}')
+
+        return errors
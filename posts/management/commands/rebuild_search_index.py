@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import is_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов'
+
+    def handle(self, *args, **options):
+        if not is_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        count = rebuild_index()
+        self.stdout.write(f'Проиндексировано постов: {count}')
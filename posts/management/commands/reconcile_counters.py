@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_comments_count, reconcile_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счетчики по реальным данным'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество записей, обрабатываемых за один проход',
+        )
+
+    def handle(self, *args, **options):
+        fixed = sum(reconcile_comments_count(options['batch_size']))
+        self.stdout.write(f'Исправлено счетчиков комментариев: {fixed}')
+        fixed = sum(reconcile_user_stats(options['batch_size']))
+        self.stdout.write(f'Исправлено счетчиков пользователей: {fixed}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = 'Показывает самые медленные по общему времени виды запросов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Количество видов запросов в отчете',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Очистить отчет после вывода',
+        )
+
+    def handle(self, *args, **options):
+        for query in SlowQuery.objects.all()[:options['top']]:
+            self.stdout.write(
+                f'{query.total_time * 1000:.0f} мс всего, '
+                f'{query.count} раз, '
+                f'до {query.max_time * 1000:.0f} мс: {query.view} '
+                f'{query.location} {query.template}'
+            )
+            self.stdout.write(f'  {query.sql}')
+            self.stdout.write(f'  Параметры: {query.params}')
+            for line in query.plan.splitlines():
+                self.stdout.write(f'    {line}')
+        if options['clear']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f'Удалено записей: {deleted}')
@@ -0,0 +1,29 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from yatube.db import mark_synced
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу данных SQLite во все реплики'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Копировать реплики можно только в SQLite')
+        connection.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            name = settings.DATABASES[alias]['NAME']
+            # Whatever was committed before the copy started is in it.
+            started = time.time()
+            replica = sqlite3.connect(name)
+            try:
+                # Online backup: the primary stays writable meanwhile.
+                connection.connection.backup(replica)
+            finally:
+                replica.close()
+            mark_synced(alias, started)
+            self.stdout.write(f'Реплика {alias} обновлена: {name}')
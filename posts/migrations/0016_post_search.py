@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    post = apps.get_model('posts', 'Post')._meta.db_table
+    group = apps.get_model('posts', 'Group')._meta.db_table
+    user = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    group_title = f'(SELECT title FROM {group} WHERE id = new.group_id)'
+    username = f'(SELECT username FROM {user} WHERE id = new.author_id)'
+    statements = [
+        f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            text, group_title, author_username,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )""",
+        f"""INSERT INTO {FTS_TABLE}(rowid, text, group_title, author_username)
+            SELECT p.id, p.text, g.title, u.username
+            FROM {post} p
+            JOIN {user} u ON u.id = p.author_id
+            LEFT JOIN {group} g ON g.id = p.group_id""",
+        f"""CREATE TRIGGER {FTS_TABLE}_post_insert AFTER INSERT ON {post}
+        BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text, group_title, author_username)
+            VALUES (new.id, new.text, {group_title}, {username});
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_post_update
+        AFTER UPDATE OF text, group_id, author_id ON {post}
+        BEGIN
+            UPDATE {FTS_TABLE}
+            SET text = new.text,
+                group_title = {group_title},
+                author_username = {username}
+            WHERE rowid = new.id;
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_post_delete AFTER DELETE ON {post}
+        BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_group_update
+        AFTER UPDATE OF title ON {group}
+        BEGIN
+            UPDATE {FTS_TABLE} SET group_title = new.title
+            WHERE rowid IN (SELECT id FROM {post} WHERE group_id = new.id);
+        END""",
+        f"""CREATE TRIGGER {FTS_TABLE}_user_update
+        AFTER UPDATE OF username ON {user}
+        BEGIN
+            UPDATE {FTS_TABLE} SET author_username = new.username
+            WHERE rowid IN (SELECT id FROM {post} WHERE author_id = new.id);
+        END""",
+    ]
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    for trigger in ('post_insert', 'post_update', 'post_delete',
+                    'group_update', 'user_update'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:58
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def count_user_stats(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserStats = apps.get_model('posts', 'UserStats')
+    stats = {pk: UserStats(user_id=pk)
+             for pk in User.objects.values_list('pk', flat=True)}
+    sources = (
+        ('followers_count', Follow.objects.all(), 'author_id'),
+        ('following_count', Follow.objects.all(), 'user_id'),
+        ('posts_count', Post.objects.all(), 'author_id'),
+    )
+    for field, queryset, column in sources:
+        counts = queryset.order_by().values_list(column)\
+                                    .annotate(count=Count('pk'))
+        for pk, count in counts:
+            setattr(stats[pk], field, count)
+    UserStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0016_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+            ],
+        ),
+        migrations.RunPython(count_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('sql', models.TextField(verbose_name='Запрос')),
+                ('params', models.TextField(blank=True, verbose_name='Последние параметры')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Выполнений')),
+                ('total_time', models.FloatField(default=0, verbose_name='Общее время, с')),
+                ('max_time', models.FloatField(default=0, verbose_name='Наибольшее время, с')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='Представление')),
+                ('location', models.CharField(blank=True, max_length=300, verbose_name='Место вызова')),
+                ('template', models.CharField(blank=True, max_length=300, verbose_name='Строка шаблона')),
+                ('plan', models.TextField(blank=True, verbose_name='План запроса')),
+                ('last_seen', models.DateTimeField(db_index=True, verbose_name='Последнее выполнение')),
+            ],
+            options={
+                'verbose_name': 'медленный запрос',
+                'verbose_name_plural': 'медленные запросы',
+                'ordering': ('-total_time',),
+            },
+        ),
+    ]
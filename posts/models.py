@@ -40,9 +40,20 @@ class Post(models.Model):
         verbose_name='Изображение',
         help_text='Добавьте своё изображение'
     )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        # Profile and group feeds; the rowid the index ends with serves
+        # the pk tie-breaker of the ordering.
+        indexes = [
+            models.Index(fields=['author', 'pub_date']),
+            models.Index(fields=['group', 'pub_date']),
+        ]
 
     def __str__(self):
         post = str(self.text)
@@ -57,6 +68,10 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField('Дата создания', auto_now_add=True)
 
+    class Meta:
+        ordering = ('created',)
+        indexes = [models.Index(fields=['post', 'created'])]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE,
@@ -66,3 +81,62 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('user', 'author')
+        # Followers of an author, covering for the fan-out.
+        indexes = [models.Index(fields=['author', 'user'])]
+
+
+class TimelineEntry(models.Model):
+    """Post pushed into a follower's feed when it is published."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [models.Index(fields=['user', 'pub_date', 'post'])]
+
+
+class PullAuthor(models.Model):
+    """Author with too many followers to fan out to.
+
+    Their posts are merged into follow feeds at read time instead.
+    """
+    author = models.OneToOneField(User, on_delete=models.CASCADE,
+                                  primary_key=True, related_name='+')
+
+
+class UserStats(models.Model):
+    """Counters shown on the author card, kept up to date by signals."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats')
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+
+
+class SlowQuery(models.Model):
+    """Queries of one shape that took longer than SLOW_QUERY_MS."""
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField('Запрос')
+    params = models.TextField('Последние параметры', blank=True)
+    count = models.PositiveIntegerField('Выполнений', default=0)
+    total_time = models.FloatField('Общее время, с', default=0)
+    max_time = models.FloatField('Наибольшее время, с', default=0)
+    view = models.CharField('Представление', max_length=200, blank=True)
+    location = models.CharField('Место вызова', max_length=300, blank=True)
+    template = models.CharField('Строка шаблона', max_length=300,
+                                blank=True)
+    plan = models.TextField('План запроса', blank=True)
+    last_seen = models.DateTimeField('Последнее выполнение', db_index=True)
+
+    class Meta:
+        ordering = ('-total_time',)
+        verbose_name = 'медленный запрос'
+        verbose_name_plural = 'медленные запросы'
+
+    def __str__(self):
+        return self.sql[:50]
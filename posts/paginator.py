@@ -0,0 +1,166 @@
+import base64
+import binascii
+from datetime import datetime
+from functools import partial
+
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.http import Http404
+
+POSTS_PER_PAGE = 10
+
+# Numbered pages cost COUNT(*) + OFFSET, so only the first pages of a feed
+# are reachable by number; deeper pages are browsed with keyset cursors.
+MAX_PAGE_NUMBER = 100
+
+ELLIPSIS = '…'
+
+
+def encode_cursor(post):
+    raw = f'{post.pub_date.isoformat()}|{post.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        pub_date, pk = raw.decode().split('|')
+        return datetime.fromisoformat(pub_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404('Неверный курсор страницы')
+
+
+class KeysetPage:
+    """Page of a feed fetched with a `(pub_date, id)` seek.
+
+    Quacks like `django.core.paginator.Page` for the templates, but has no
+    paginator and no page number: links carry opaque cursors instead.
+    """
+    paginator = None
+    number = None
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1])
+
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0])
+
+
+def seek(queryset, cursor=None, newer=False, limit=POSTS_PER_PAGE,
+         key=('pub_date', 'pk')):
+    """Return up to `limit` rows just past `cursor`, nearest first.
+
+    `key` names the `(pub_date, id)` pair of columns to seek on.
+    """
+    date_field, pk_field = key
+    if cursor is not None:
+        pub_date, pk = decode_cursor(cursor)
+        lookup = 'gt' if newer else 'lt'
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__{lookup}e': pub_date}),
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{f'{pk_field}__{lookup}': pk}),
+        )
+    if newer:
+        queryset = queryset.order_by(date_field, pk_field)
+    else:
+        queryset = queryset.order_by(f'-{date_field}', f'-{pk_field}')
+
+    return list(queryset[:limit])
+
+
+def keyset_page(feed, after=None, before=None, per_page=POSTS_PER_PAGE):
+    # Feeds that are not a plain queryset of posts provide their own seek().
+    fetch = getattr(feed, 'seek', None) or partial(seek, feed)
+    if before is not None:
+        posts = fetch(before, newer=True, limit=per_page + 1)
+        if len(posts) < per_page:
+            # Near the top of the feed: show a full first page instead.
+            return keyset_page(feed, per_page=per_page)
+        has_previous = len(posts) > per_page
+        posts = posts[:per_page][::-1]
+        return KeysetPage(posts, has_next=bool(posts),
+                          has_previous=has_previous)
+
+    posts = fetch(after, newer=False, limit=per_page + 1)
+    return KeysetPage(posts[:per_page],
+                      has_next=len(posts) > per_page,
+                      has_previous=after is not None and bool(posts))
+
+
+def elided_page_range(page, on_each_side=2, on_ends=1):
+    """Page numbers around the current page with the ends and ellipses.
+
+    The size of the range does not depend on the number of pages. An
+    ellipsis stands for two pages or more, a single one is shown instead.
+    """
+    num_pages = min(page.paginator.num_pages, MAX_PAGE_NUMBER)
+    window = range(max(page.number - on_each_side, 1),
+                   min(page.number + on_each_side, num_pages) + 1)
+    page_range = []
+    if window.start > on_ends + 2:
+        page_range.extend(range(1, on_ends + 1))
+        page_range.append(ELLIPSIS)
+    else:
+        page_range.extend(range(1, window.start))
+    page_range.extend(window)
+    if window.stop < num_pages - on_ends:
+        page_range.append(ELLIPSIS)
+        page_range.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        page_range.extend(range(window.stop, num_pages + 1))
+
+    return page_range
+
+
+def paginate(request, feed, per_page=POSTS_PER_PAGE):
+    """Return `(paginator, page)` for a feed ordered by `-pub_date`.
+
+    `?after=`/`?before=` switch to keyset mode, in which case `paginator`
+    is None. Otherwise the numbered paginator is used for shallow pages.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after or before:
+        return None, keyset_page(feed, after=after or None,
+                                 before=before or None, per_page=per_page)
+
+    page_number = request.GET.get('page')
+    if page_number and page_number.isdigit() \
+            and int(page_number) > MAX_PAGE_NUMBER:
+        raise Http404('Страница не найдена')
+    if isinstance(feed, QuerySet):
+        feed = feed.order_by('-pub_date', '-pk')
+    paginator = Paginator(feed, per_page)
+    page = paginator.get_page(page_number)
+    page.page_range = elided_page_range(page)
+    if page.has_next() and page.number >= MAX_PAGE_NUMBER:
+        page.next_cursor = encode_cursor(page[len(page) - 1])
+
+    return paginator, page
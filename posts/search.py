@@ -0,0 +1,132 @@
+import base64
+import binascii
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.http import Http404
+
+from .models import Group, Post, User
+from .paginator import POSTS_PER_PAGE
+
+FTS_TABLE = 'posts_post_fts'
+
+# bm25() weights of the text, group_title and author_username columns.
+WEIGHTS = (4.0, 2.0, 1.0)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Turn user input into an FTS5 query that never has a syntax error.
+
+    Every word becomes a quoted term, all of them are required and the
+    last one is matched as a prefix, so results show up while typing.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+
+    return ' '.join(terms)
+
+
+def _encode_cursor(score, pk):
+    raw = f'{score!r}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        score, pk = raw.decode().split('|')
+        return float(score), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404('Неверный курсор страницы')
+
+
+def search_posts(query, after=None, limit=POSTS_PER_PAGE):
+    """Return `(posts, next_cursor)` best BM25 matches first.
+
+    Pages are seeked on `(score, rowid)`, which saves fetching the rows
+    of earlier pages, but every match is still scored and sorted, so a
+    page costs as much as the number of matches. Scores depend on the
+    whole index: after posts are added, edited or deleted the cursor no
+    longer points at the same place, and the next page may repeat or skip
+    a few posts.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return [], None
+    if not is_available():
+        return _search_posts_fallback(query, after, limit)
+
+    score = f'bm25({FTS_TABLE}, {", ".join(map(str, WEIGHTS))})'
+    sql = f'SELECT rowid, {score} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    params = [expression]
+    if after is not None:
+        last_score, last_pk = _decode_cursor(after)
+        sql += f' AND ({score} > %s OR ({score} = %s AND rowid > %s))'
+        params += [last_score, last_score, last_pk]
+    sql += f' ORDER BY {score}, rowid LIMIT %s'
+    params.append(limit + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    posts = Post.objects.select_related('author')\
+                        .in_bulk([pk for pk, _ in rows[:limit]])
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = _encode_cursor(rows[limit - 1][1], rows[limit - 1][0])
+
+    return [posts[pk] for pk, _ in rows[:limit] if pk in posts], next_cursor
+
+
+def _search_posts_fallback(query, after, limit):
+    posts = Post.objects.filter(text__icontains=query)\
+                        .select_related('author')\
+                        .order_by('-pk')
+    if after is not None:
+        posts = posts.filter(pk__lt=_decode_cursor(after)[1])
+    posts = list(posts[:limit + 1])
+    next_cursor = None
+    if len(posts) > limit:
+        next_cursor = _encode_cursor(0.0, posts[limit - 1].pk)
+
+    return posts[:limit], next_cursor
+
+
+def filter_posts(queryset, query):
+    """Narrow a queryset of posts down to the ones matching `query`."""
+    expression = match_expression(query)
+    if expression is None:
+        return queryset
+    if not is_available():
+        return queryset.filter(text__icontains=query)
+
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression],
+    ))
+
+
+@transaction.atomic
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}'
+            f'(rowid, text, group_title, author_username) '
+            f'SELECT p.id, p.text, g.title, u.username '
+            f'FROM {Post._meta.db_table} p '
+            f'JOIN {User._meta.db_table} u ON u.id = p.author_id '
+            f'LEFT JOIN {Group._meta.db_table} g ON g.id = p.group_id'
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) "
+                       f"VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
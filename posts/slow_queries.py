@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'%s(?:, %s)+')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+\b')
+_SPACE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """SQL with literals, placeholder lists and spacing normalized.
+
+    Queries differing only in LIMIT/OFFSET values or in the length of an
+    IN list have the same shape.
+    """
+    shape = _SPACE.sub(' ', sql).strip()
+    shape = _STRING.sub('%s', shape)
+    shape = _NUMBER.sub('%s', shape)
+    return _IN_LIST.sub('%s, ...', shape)
+
+
+def _template_line():
+    # The innermost template node being rendered, if any.
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        frame = frame.f_back
+    return ''
+
+
+def _code_line():
+    # The innermost frame of the project's own code.
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path.startswith(settings.BASE_DIR) and path != __file__ \
+                and f'{os.sep}site-packages{os.sep}' not in path:
+            relative = os.path.relpath(path, settings.BASE_DIR)
+            return f'{relative}:{frame.f_lineno} {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ''
+
+
+def explain(connection, sql, params):
+    """Return the plan of a SELECT, one line per step."""
+    if sql.lstrip()[:6].upper() != 'SELECT':
+        return ''
+    # A cursor of its own and without execute wrappers, the one that ran
+    # the query may still have rows to fetch.
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}',
+                       params)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError:
+        return ''
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """`execute_wrapper` hook collecting queries slower than SLOW_QUERY_MS."""
+
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration * 1000 >= self.threshold:
+                self.add(sql, params, many, context, duration)
+
+    @property
+    def view(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else self.request.path
+
+    def add(self, sql, params, many, context, duration):
+        query = {
+            'sql': query_shape(sql),
+            'params': repr(params)[:1000],
+            'duration': duration,
+            'view': self.view,
+            'location': _code_line(),
+            'template': _template_line(),
+            'plan': '' if many else explain(context['connection'], sql,
+                                            params),
+        }
+        logger.warning(
+            '%.0f ms in %s (%s %s): %s %s\n%s', duration * 1000,
+            query['view'], query['location'], query['template'], sql,
+            query['params'], query['plan'],
+        )
+        self.queries.append(query)
+
+
+def _add(fingerprint, duration, last):
+    return SlowQuery.objects.filter(fingerprint=fingerprint).update(
+        count=F('count') + 1,
+        total_time=F('total_time') + duration,
+        max_time=Greatest('max_time', Value(duration)),
+        **last,
+    )
+
+
+def record(queries):
+    """Add the queries to the report and drop shapes gone quiet."""
+    now = timezone.now()
+    for query in queries:
+        fingerprint = hashlib.sha1(query['sql'].encode()).hexdigest()
+        duration = query.pop('duration')
+        last = dict(query, last_seen=now)
+        if _add(fingerprint, duration, last):
+            continue
+        try:
+            with transaction.atomic():
+                SlowQuery.objects.create(fingerprint=fingerprint, count=1,
+                                         total_time=duration,
+                                         max_time=duration, **last)
+        except IntegrityError:
+            # Another process created it meanwhile.
+            _add(fingerprint, duration, last)
+    window = timedelta(days=settings.SLOW_QUERY_WINDOW_DAYS)
+    SlowQuery.objects.filter(last_seen__lt=now - window).delete()
+
+
+class SlowQueryMiddleware:
+    """Log and aggregate the queries slower than `SLOW_QUERY_MS`.
+
+    Each one is logged with its parameters, the view, the code and the
+    template line that ran it and its plan. Queries of the same shape are
+    summed up in SlowQuery rows, shown in the admin and by the
+    `slow_queries` command. Shapes not seen for `SLOW_QUERY_WINDOW_DAYS`
+    are dropped.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_MS
+        if threshold is None:
+            return self.get_response(request)
+        log = SlowQueryLog(request, threshold)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(log))
+            response = self.get_response(request)
+        # Outside of the view's transactions, so a rollback keeps them.
+        if log.queries:
+            try:
+                record(log.queries)
+            except DatabaseError:
+                logger.exception('Could not record slow queries')
+
+        return response
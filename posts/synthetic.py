@@ -0,0 +1,233 @@
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .cache import touch
+from .counters import reconcile_comments_count, reconcile_user_stats
+from .groups import group_registry
+from .models import Comment, Follow, Group, Post, PullAuthor, TimelineEntry
+from .models import User
+from .timeline import switch_to_pull
+
+WORDS = (
+    'кот собака утро вечер город море солнце дождь книга песня дорога '
+    'друг работа отпуск кофе чай поезд лес река горы снег лето осень '
+    'весна зима дом окно сад парк улица мост музей фильм новость '
+    'сегодня вчера завтра очень просто снова наконец хорошо красиво'
+).split()
+
+
+def _text(generator, low, high):
+    return ' '.join(generator.choices(WORDS, k=generator.randint(low, high)))
+
+
+def _zipf_weights(count, exponent=1.0):
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def _batches(objects, size):
+    iterator = iter(objects)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def _explicit_dates(*fields):
+    # bulk_create runs pre_save, which stamps auto_now_add fields with now.
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _bulk_create(model, objects, batch_size):
+    # One transaction per batch, the backend splits it into INSERTs that
+    # fit its limit on query parameters.
+    created = 0
+    for batch in _batches(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        created += len(batch)
+
+    return created
+
+
+def _next_id(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def create_users(count, batch_size):
+    password = make_password(None)
+    offset = User.objects.count()
+    users = (User(username=f'user{number}', password=password,
+                  first_name='Пользователь', last_name=str(number))
+             for number in range(offset, offset + count))
+
+    return _bulk_create(User, users, batch_size)
+
+
+def create_groups(count, batch_size):
+    offset = Group.objects.count()
+    groups = (Group(title=f'Группа {number}', slug=f'group-{number}',
+                    description=f'Описание группы {number}')
+              for number in range(offset, offset + count))
+
+    return _bulk_create(Group, groups, batch_size)
+
+
+def create_follows(per_user, batch_size, generator):
+    """Follow a Pareto-distributed number of Zipf-popular authors."""
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    authors = user_ids[:]
+    generator.shuffle(authors)
+    weights = _zipf_weights(len(authors))
+    existing = set(Follow.objects.values_list('user_id', 'author_id'))
+    # Pareto with shape 2 has mean 2, halve it to get `per_user` on average.
+    alpha = 2.0
+
+    def follows():
+        for user_id in user_ids:
+            count = int(per_user / 2 * generator.paretovariate(alpha))
+            count = min(count, len(authors) - 1)
+            chosen = set(generator.choices(authors, cum_weights=weights,
+                                           k=count))
+            for author_id in chosen:
+                if author_id != user_id \
+                        and (user_id, author_id) not in existing:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+    return _bulk_create(Follow, follows(), batch_size)
+
+
+def create_posts(count, batch_size, generator, days):
+    author_ids = list(User.objects.values_list('pk', flat=True))
+    generator.shuffle(author_ids)
+    weights = _zipf_weights(len(author_ids))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    now = timezone.now()
+    span = timedelta(days=days).total_seconds()
+
+    def posts():
+        for author_id in generator.choices(author_ids, cum_weights=weights,
+                                           k=count):
+            group_id = None
+            if group_ids and generator.random() < 0.7:
+                group_id = generator.choice(group_ids)
+            yield Post(
+                text=_text(generator, 5, 60),
+                author_id=author_id,
+                group_id=group_id,
+                pub_date=now - timedelta(seconds=generator.random() * span),
+            )
+
+    with _explicit_dates(Post._meta.get_field('pub_date')):
+        return _bulk_create(Post, posts(), batch_size)
+
+
+def create_comments(count, batch_size, generator, days):
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    if not post_ids:
+        return 0
+    now = timezone.now()
+    span = timedelta(days=days).total_seconds()
+    comments = (
+        Comment(
+            post_id=generator.choice(post_ids),
+            author_id=generator.choice(user_ids),
+            text=_text(generator, 3, 30),
+            created=now - timedelta(seconds=generator.random() * span),
+        )
+        for _ in range(count)
+    )
+    with _explicit_dates(Comment._meta.get_field('created')):
+        return _bulk_create(Comment, comments, batch_size)
+
+
+def build_timelines(first_follow_id, first_post_id):
+    """Do in bulk what the Post and Follow signals do one by one.
+
+    Authors over the fan-out limit are switched to pull, posts from
+    `first_post_id` on are pushed to every follower and follows from
+    `first_follow_id` on are backfilled with the author's latest posts.
+    Returns the number of timeline entries created.
+    """
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    popular = Follow.objects.order_by()\
+                            .values('author_id')\
+                            .annotate(followers=Count('pk'))\
+                            .filter(followers__gt=limit)
+    for author_id in popular.values_list('author_id', flat=True):
+        switch_to_pull(author_id)
+
+    entries = TimelineEntry._meta.db_table
+    follows = Follow._meta.db_table
+    posts = Post._meta.db_table
+    pull = PullAuthor._meta.db_table
+    columns = f'{entries} (user_id, post_id, author_id, pub_date)'
+    with connection.cursor() as cursor:
+        before = TimelineEntry.objects.count()
+        cursor.execute(
+            f'INSERT INTO {columns} '
+            f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+            f'FROM {posts} p JOIN {follows} f ON f.author_id = p.author_id '
+            f'WHERE p.id >= %s '
+            f'AND p.author_id NOT IN (SELECT author_id FROM {pull}) '
+            f'ON CONFLICT DO NOTHING',
+            [first_post_id],
+        )
+        cursor.execute(
+            f'INSERT INTO {columns} '
+            f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+            f'FROM {follows} f JOIN ('
+            f'  SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'    PARTITION BY author_id ORDER BY pub_date DESC'
+            f'  ) AS position FROM {posts}'
+            f') p ON p.author_id = f.author_id AND p.position <= %s '
+            f'WHERE f.id >= %s '
+            f'AND f.author_id NOT IN (SELECT author_id FROM {pull}) '
+            f'ON CONFLICT DO NOTHING',
+            [settings.TIMELINE_BACKFILL_LIMIT, first_follow_id],
+        )
+
+    return TimelineEntry.objects.count() - before
+
+
+def generate(users, groups, follows, posts, comments, batch_size=5000,
+             seed=None, days=365):
+    """Add a synthetic data set on top of the existing one.
+
+    Yields `(stage, count)` as the stages finish. Denormalized data the
+    signals would maintain (timelines, counters) is built in bulk, the
+    search index is filled by its triggers.
+    """
+    generator = random.Random(seed)
+    first_follow_id = _next_id(Follow)
+    first_post_id = _next_id(Post)
+    yield 'users', create_users(users, batch_size)
+    yield 'groups', create_groups(groups, batch_size)
+    # bulk_create sends no signals, processes reload the groups on this.
+    group_registry.changed()
+    yield 'follows', create_follows(follows, batch_size, generator)
+    yield 'posts', create_posts(posts, batch_size, generator, days)
+    yield 'comments', create_comments(comments, batch_size, generator, days)
+    yield 'timeline', build_timelines(first_follow_id, first_post_id)
+    yield 'comments_count', sum(reconcile_comments_count(batch_size))
+    yield 'user_stats', sum(reconcile_user_stats(batch_size))
+    touch('site')
@@ -0,0 +1,42 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from posts.cache import post_version as get_post_version
+from posts.cache import post_versions
+from posts.groups import attach_groups
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post_item.html'
+
+
+@register.simple_tag(takes_context=True)
+def post_version(context, post):
+    # Looked up ahead for the whole page by {% post_cards %}.
+    version = context.get('post_versions', {}).get(post.pk)
+    return version or get_post_version(post)
+
+
+def _render_cards(context, posts):
+    # Unlike {% include %} in a loop, the card template is resolved once
+    # and the versions of all cards are read from the cache at once. Groups
+    # come from the registry, querysets need not join them.
+    card = context.template.engine.get_template(CARD_TEMPLATE)
+    attach_groups(posts)
+    with context.push(post_versions=post_versions(posts)):
+        cards = []
+        for post in posts:
+            with context.push(post=post):
+                cards.append(card.render(context))
+
+    return mark_safe(''.join(cards))
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    return _render_cards(context, list(posts))
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    return _render_cards(context, [post])
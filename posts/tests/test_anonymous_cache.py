@@ -0,0 +1,102 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, Client
+from django.urls import reverse
+
+from posts.cache import get_versions, get_watermarks
+from posts.models import Group, Post, User
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Лучшие',
+            slug='best',
+            description='Лучшая группа в мире..',
+        )
+        cls.user = User.objects.create(username='hulk')
+        cls.post = Post.objects.create(
+            text='Тестовая страница',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(AnonymousPageCacheTests.user)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group', kwargs={
+                'slug': AnonymousPageCacheTests.group.slug,
+            }),
+            'profile': reverse('posts:profile', kwargs={
+                'username': AnonymousPageCacheTests.user.username,
+            }),
+            'post': reverse('posts:post', kwargs={
+                'username': AnonymousPageCacheTests.user.username,
+                'post_id': AnonymousPageCacheTests.post.id,
+            }),
+        }
+
+    def test_anonymous_pages_set_no_cookies(self):
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertFalse(response.cookies,
+                                 f'Страница {name} ставит гостю cookie')
+                self.assertNotIn('csrfmiddlewaretoken',
+                                 response.content.decode())
+                self.assertEqual(response['Vary'], 'Cookie')
+
+    def test_repeated_anonymous_request_runs_no_queries(self):
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertContains(response, 'Тестовая страница')
+
+    def test_write_invalidates_cached_pages(self):
+        for url in self.urls.values():
+            self.guest_client.get(url)
+        post = AnonymousPageCacheTests.post
+        post.text = 'Исправленная страница'
+        post.save()
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), 'Исправленная страница',
+                    msg_prefix=f'Страница {name} не обновилась после правки',
+                )
+
+    def test_logged_in_visitors_are_not_served_from_cache(self):
+        url = self.urls['post']
+        self.guest_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'csrfmiddlewaretoken',
+                            msg_prefix='Пользователю отдана гостевая страница')
+        self.assertIsNotNone(response.context,
+                             'Страница пользователя взята из кеша')
+
+
+class AfterCommitTests(TransactionTestCase):
+    def test_watermarks_and_versions_move_again_after_commit(self):
+        cache.clear()
+        user = User.objects.create(username='hulk')
+        with transaction.atomic():
+            post = Post.objects.create(text='Тестовая страница',
+                                       author=user)
+            watermark = get_watermarks('posts')[0]
+            version = get_versions(('post', post.pk))
+            # A page rendered now would not show the post yet.
+            time.sleep(0.01)
+        self.assertGreater(get_watermarks('posts')[0], watermark,
+                           'Отметка не сдвинута после фиксации')
+        self.assertNotEqual(get_versions(('post', post.pk)), version,
+                            'Версия не изменена после фиксации')
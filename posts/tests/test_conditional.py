@@ -0,0 +1,96 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Лучшие',
+            slug='best',
+            description='Лучшая группа в мире..',
+        )
+        cls.user = User.objects.create(username='hulk')
+        cls.post = Post.objects.create(
+            text='Тестовая страница',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTests.user)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group', kwargs={
+                'slug': ConditionalGetTests.group.slug,
+            }),
+            'profile': reverse('posts:profile', kwargs={
+                'username': ConditionalGetTests.user.username,
+            }),
+            'post': reverse('posts:post', kwargs={
+                'username': ConditionalGetTests.user.username,
+                'post_id': ConditionalGetTests.post.id,
+            }),
+        }
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+
+        return client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_unchanged_pages_return_304(self):
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(self.guest_client, url),
+                    304,
+                    f'Неизмененная страница {name} отдается целиком'
+                )
+
+    def test_changed_pages_return_200(self):
+        etags = {name: self.guest_client.get(url)['ETag']
+                 for name, url in self.urls.items()}
+        Comment.objects.create(
+            post=ConditionalGetTests.post,
+            author=ConditionalGetTests.user,
+            text='Комментарий',
+        )
+        for name, url in self.urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[name],
+                )
+                self.assertEqual(
+                    response.status_code,
+                    200,
+                    f'Страница {name} не обновилась после комментария'
+                )
+
+    def test_personal_pages_have_own_etag(self):
+        url = self.urls['index']
+        guest_response = self.guest_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertNotEqual(
+            guest_response['ETag'],
+            response['ETag'],
+            'ETag страницы пользователя совпадает с гостевым'
+        )
+        self.assertEqual(self.revalidate(self.authorized_client, url), 304,
+                         'Неизмененная личная страница отдается целиком')
+
+    def test_if_modified_since_does_not_hide_write(self):
+        url = self.urls['index']
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('Last-Modified'),
+                         'Дата изменения теряет доли секунды')
+        Post.objects.create(text='Новая страница',
+                            author=ConditionalGetTests.user)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Sat, 01 Jan 2100 00:00:00 GMT')
+        self.assertContains(response, 'Новая страница',
+                            msg_prefix='Запись в ту же секунду дала 304')
@@ -0,0 +1,115 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+
+class CommentsCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.post = Post.objects.create(
+            text='Тестовая страница',
+            author=cls.user,
+        )
+
+    def stored_count(self):
+        return Post.objects.get(pk=CommentsCountTests.post.pk).comments_count
+
+    def test_comments_count_follows_comments(self):
+        comment = Comment.objects.create(
+            post=CommentsCountTests.post,
+            author=CommentsCountTests.user,
+            text='Комментарий',
+        )
+        self.assertEqual(self.stored_count(), 1,
+                         'Счетчик не увеличился при добавлении комментария')
+        comment.delete()
+        self.assertEqual(self.stored_count(), 0,
+                         'Счетчик не уменьшился при удалении комментария')
+
+    def test_failed_counter_update_rolls_comment_back(self):
+        client = Client()
+        client.force_login(CommentsCountTests.user)
+        url = reverse('posts:add_comment', kwargs={
+            'username': CommentsCountTests.user.username,
+            'post_id': CommentsCountTests.post.pk,
+        })
+        with mock.patch('posts.counters.comment_added',
+                        side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            client.post(url, {'text': 'Комментарий'})
+        self.assertFalse(Comment.objects.exists(),
+                         'Комментарий сохранен без счетчика')
+
+    def test_reconcile_counters_fixes_drift(self):
+        Comment.objects.create(
+            post=CommentsCountTests.post,
+            author=CommentsCountTests.user,
+            text='Комментарий',
+        )
+        Post.objects.update(comments_count=42)
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.stored_count(), 1,
+                         'Команда не исправила расхождение счетчика')
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.author = User.objects.create(username='thor')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(UserStatsTests.user)
+
+    def stats(self, user):
+        stats = UserStats.objects.get(user=user)
+        return stats.followers_count, stats.following_count, stats.posts_count
+
+    def test_stats_follow_follows_and_posts(self):
+        author = UserStatsTests.author
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[author.username]))
+        post = Post.objects.create(text='Тестовая страница', author=author)
+        self.assertEqual(self.stats(author), (1, 0, 1),
+                         'Счетчики автора не обновились')
+        self.assertEqual(self.stats(UserStatsTests.user), (0, 1, 0),
+                         'Счетчики подписчика не обновились')
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[author.username]))
+        post.delete()
+        self.assertEqual(self.stats(author), (0, 0, 0),
+                         'Счетчики автора не уменьшились')
+        self.assertEqual(self.stats(UserStatsTests.user), (0, 0, 0),
+                         'Счетчики подписчика не уменьшились')
+
+    def test_profile_reads_stats(self):
+        author = UserStatsTests.author
+        Follow.objects.create(user=UserStatsTests.user, author=author)
+        Post.objects.create(text='Тестовая страница', author=author)
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=[author.username]))
+        self.assertEqual(response.context['stats'].followers_count, 1,
+                         'Неверное количество подписчиков в профиле')
+        self.assertEqual(response.context['post_count'], 1,
+                         'Неверное количество постов в профиле')
+
+    def test_reconcile_counters_fixes_user_stats(self):
+        author = UserStatsTests.author
+        Follow.objects.create(user=UserStatsTests.user, author=author)
+        UserStats.objects.filter(user=author).update(followers_count=42)
+        UserStats.objects.filter(user=UserStatsTests.user).delete()
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.stats(author), (1, 0, 0),
+                         'Команда не исправила счетчики автора')
+        self.assertEqual(self.stats(UserStatsTests.user), (0, 1, 0),
+                         'Команда не восстановила счетчики пользователя')
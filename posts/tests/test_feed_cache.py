@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import fetch, touch
+from posts.models import Follow, Post, User
+
+THREADS = 8
+
+
+class FetchTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, value='new', delay=0.2):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def run_concurrently(self, call):
+        barrier = threading.Barrier(THREADS)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(call())
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def test_cold_miss_is_computed_once(self):
+        results = self.run_concurrently(
+            lambda: fetch('feed', self.compute(), 20, 'v1'))
+        self.assertEqual(self.calls, 1, 'Страница пересчитана несколько раз')
+        self.assertEqual(results, [('new', True)] * THREADS,
+                         'Ожидавшие не получили пересчитанную страницу')
+
+    def test_stale_value_is_served_while_rebuilding(self):
+        fetch('feed', self.compute('old', delay=0), 20, 'v1')
+        self.calls = 0
+        results = self.run_concurrently(
+            lambda: fetch('feed', self.compute(), 20, 'v2'))
+        self.assertEqual(self.calls, 1, 'Страница пересчитана несколько раз')
+        self.assertEqual(results.count(('new', True)), 1)
+        self.assertEqual(results.count(('old', False)), THREADS - 1,
+                         'Во время пересчета не отдана старая страница')
+        self.assertEqual(fetch('feed', self.compute(), 20, 'v2'),
+                         ('new', True))
+        self.assertEqual(self.calls, 1)
+
+    def test_writers_wait_for_the_rebuild(self):
+        fetch('feed', self.compute('old', delay=0), 20, 'v1')
+        rebuild = threading.Thread(
+            target=fetch, args=('feed', self.compute(), 20, 'v2'))
+        rebuild.start()
+        time.sleep(0.05)
+        result = fetch('feed', self.compute('own'), 20, 'v2',
+                       allow_stale=False)
+        rebuild.join()
+        self.assertEqual(result, ('new', True),
+                         'Автору изменений отдана старая страница')
+        self.assertEqual(self.calls, 2)
+
+    def test_early_expiration(self):
+        fetch('feed', self.compute('old', delay=0.05), 20, 'v1')
+        with mock.patch('posts.cache.random.random', return_value=0.5):
+            fetch('feed', self.compute(), 20, 'v1')
+        self.assertEqual(self.calls, 1, 'Свежая страница пересчитана')
+        with mock.patch('posts.cache.time.time',
+                        return_value=time.time() + 19.99), \
+                mock.patch('posts.cache.random.random',
+                           return_value=0.999):
+            with override_settings(FEED_CACHE_BETA=0):
+                self.assertEqual(fetch('feed', self.compute(), 20, 'v1'),
+                                 ('old', True),
+                                 'Страница пересчитана до истечения срока')
+            self.assertEqual(fetch('feed', self.compute(), 20, 'v1'),
+                             ('new', True),
+                             'Страница не пересчитана до истечения срока')
+        self.assertEqual(self.calls, 2)
+
+
+class FeedPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.author = User.objects.create(username='thor')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Post.objects.create(text='Тестовая страница', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedPageTests.user)
+
+    def test_cached_page_skips_the_feed_queries(self):
+        for url in (reverse('posts:index'), reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                self.authorized_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(url)
+                self.assertFalse(
+                    [query for query in queries
+                     if query['sql'].startswith('SELECT COUNT(*)')],
+                    'Число постов ленты не взято из кеша',
+                )
+                self.assertContains(response, 'Тестовая страница')
+
+    def test_new_posts_rebuild_the_page(self):
+        for url in (reverse('posts:index'), reverse('posts:follow_index')):
+            self.authorized_client.get(url)
+        Post.objects.create(text='Новый пост', author=FeedPageTests.author)
+        for url in (reverse('posts:index'), reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                self.assertContains(self.authorized_client.get(url),
+                                    'Новый пост')
+
+    def test_stale_page_has_no_validators(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        touch('posts')
+        # Another process is rebuilding the page.
+        key = 'feed:index:' + hashlib.md5(b'||').hexdigest()
+        cache.add(f'{key}:lock', 1)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Тестовая страница')
+        self.assertFalse(response.has_header('ETag'),
+                         'Устаревшая страница отдана с текущим ETag')
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        cache.delete(f'{key}:lock')
+        response = self.authorized_client.get(url)
+        self.assertTrue(response.has_header('ETag'),
+                        'Свежая страница отдана без ETag')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_writer_is_not_served_stale_page(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        self.authorized_client.post(reverse('posts:new_post'),
+                                    {'text': 'Свой пост'})
+        # Another process is rebuilding the page.
+        key = 'feed:index:' + hashlib.md5(b'||').hexdigest()
+        cache.add(f'{key}:lock', 1)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Свой пост',
+                            msg_prefix='Автору отдана старая страница')
+        self.assertTrue(response.has_header('ETag'),
+                        'Автору отдана устаревшая страница')
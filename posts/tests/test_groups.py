@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import bump_version
+from posts.groups import VERSION, group_registry
+from posts.models import Group, Post, User
+
+
+class GroupRegistryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.group = Group.objects.create(title='Лучшие', slug='best',
+                                         description='Лучшая группа')
+        Post.objects.create(text='Тестовая страница', author=cls.user,
+                            group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(GroupRegistryTests.user)
+
+    def group_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        return [query for query in queries
+                if 'FROM "posts_group"' in query['sql']]
+
+    def test_pages_read_groups_from_registry(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group', args=['best']),
+            reverse('posts:profile', args=['hulk']),
+        )
+        self.group_queries(urls[0])
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.group_queries(url), [],
+                                 'Группа прочитана из базы')
+
+    def test_registry_is_reloaded_on_save(self):
+        self.assertEqual(group_registry.get_by_slug('best').title, 'Лучшие')
+        group = Group.objects.get(slug='best')
+        group.title = 'Другие'
+        group.slug = 'other'
+        group.save()
+        self.assertIsNone(group_registry.get_by_slug('best'))
+        self.assertEqual(group_registry.get(group.pk).title, 'Другие')
+        response = self.authorized_client.get(
+            reverse('posts:group', args=['best']))
+        self.assertEqual(response.status_code, 404,
+                         'Группа доступна по старому адресу')
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, '#Другие',
+                            msg_prefix='Карточка не обновилась')
+
+    def test_registry_follows_version_of_other_processes(self):
+        group_registry.by_id()
+        with self.assertNumQueries(0):
+            group_registry.by_id()
+        bump_version(*VERSION)
+        with self.assertNumQueries(1):
+            group_registry.by_id()
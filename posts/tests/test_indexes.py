@@ -0,0 +1,83 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Лучшие',
+            slug='best',
+            description='Лучшая группа в мире..',
+        )
+        cls.user = User.objects.create(username='hulk')
+        cls.author = User.objects.create(username='thor')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Тестовая страница',
+            author=cls.author,
+            group=cls.group,
+        )
+        Comment.objects.create(post=cls.post, author=cls.user,
+                               text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryPlanTests.user)
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def main_query(self, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if sql.startswith('SELECT') and f'FROM "{table}"' in sql \
+                    and 'ORDER BY' in sql:
+                return sql
+        self.fail(f'Страница {url} не выбирает из {table}')
+
+    def assertUsesIndex(self, sql):
+        plan = self.query_plan(sql)
+        for step in plan:
+            self.assertNotRegex(step, FULL_SCAN,
+                                f'Полный просмотр таблицы: {plan}')
+            self.assertNotIn('TEMP B-TREE', step,
+                             f'Сортировка без индекса: {plan}')
+
+    def test_views_main_queries_use_indexes(self):
+        author = QueryPlanTests.author.username
+        views = (
+            (reverse('posts:index'), 'posts_post'),
+            (reverse('posts:group', args=['best']), 'posts_post'),
+            (reverse('posts:profile', args=[author]), 'posts_post'),
+            (reverse('posts:post', args=[author, QueryPlanTests.post.id]),
+             'posts_comment'),
+            (reverse('posts:follow_index'), 'posts_timelineentry'),
+        )
+        for url, table in views:
+            with self.subTest(url=url):
+                self.assertUsesIndex(self.main_query(url, table))
+
+    def test_followers_lookup_uses_covering_index(self):
+        followers = Follow.objects.filter(author=QueryPlanTests.author)\
+                                  .values_list('user_id', flat=True)
+        plan = self.query_plan(str(followers.query))
+        self.assertTrue(
+            any('COVERING INDEX' in step for step in plan),
+            f'Поиск подписчиков читает таблицу: {plan}'
+        )
@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import touch
+from posts.feeds import hydrate_posts
+from posts.models import Group, Post, User
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Группа')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.user,
+                                group=cls.group if number % 2 else None)
+            for number in range(3)
+        ]
+        cls.ids = [post.pk for post in cls.posts]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ObjectCacheTests.user)
+
+    def test_warm_hydration_runs_no_queries(self):
+        hydrate_posts(self.ids)
+        with self.assertNumQueries(0):
+            posts = hydrate_posts(self.ids[::-1])
+            self.assertEqual([post.pk for post in posts], self.ids[::-1],
+                             'Нарушен порядок постов')
+            self.assertEqual(posts[1].group.slug, 'group')
+            self.assertIsNone(posts[0].group)
+            self.assertEqual(posts[0].author.username, 'hulk')
+
+    def test_saves_and_deletes_invalidate(self):
+        hydrate_posts(self.ids)
+        post = Post.objects.get(pk=self.ids[0])
+        post.text = 'Исправленный пост'
+        post.save()
+        user = User.objects.get(pk=ObjectCacheTests.user.pk)
+        user.username = 'thor'
+        user.save()
+        group = Group.objects.get(pk=ObjectCacheTests.group.pk)
+        group.title = 'Другая группа'
+        group.save()
+        Post.objects.filter(pk=self.ids[2]).delete()
+        posts = hydrate_posts(self.ids)
+        self.assertEqual(len(posts), 2, 'Удаленный пост не пропущен')
+        self.assertEqual(posts[0].text, 'Исправленный пост',
+                         'Пост не обновился после правки')
+        self.assertEqual(posts[0].author.username, 'thor',
+                         'Автор не обновился после правки')
+        self.assertEqual(posts[1].group.title, 'Другая группа',
+                         'Группа не обновилась после правки')
+
+    def test_rebuilt_feed_page_reads_only_ids(self):
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        touch('posts')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        feed_queries = [query['sql'] for query in queries
+                        if 'FROM "posts_post"' in query['sql']]
+        self.assertEqual(len(feed_queries), 2,
+                         'Посты страницы не взяты из кеша')
+        self.assertTrue(feed_queries[0].startswith('SELECT COUNT(*)'))
+        self.assertTrue(
+            feed_queries[1].startswith(
+                'SELECT "posts_post"."id", "posts_post"."pub_date" FROM'),
+            'Лента читает из базы не только id и даты',
+        )
+        self.assertContains(response, 'Пост 2')
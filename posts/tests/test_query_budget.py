@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from posts.decorators import QueryBudgetExceeded, query_budget, uncounted
+from posts.models import Follow, Group, Post, User
+from posts.urls import urlpatterns
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.post = Post.objects.create(text='Тестовая страница',
+                                       author=cls.user)
+        for number in range(12):
+            author = User.objects.create(username=f'author{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group{number}',
+                description='Группа',
+            )
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(text='Тестовая страница', author=author,
+                                group=group)
+            Post.objects.create(text='Тестовая страница', author=cls.user,
+                                group=group)
+
+    def setUp(self):
+        # Fragment caches hide an N+1, render the cards from scratch.
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryBudgetTests.user)
+
+    def test_every_route_has_budget(self):
+        for pattern in urlpatterns:
+            with self.subTest(route=pattern.name):
+                self.assertIsNotNone(
+                    getattr(pattern.callback, 'query_budget', None),
+                    f'У страницы {pattern.name} нет бюджета запросов'
+                )
+
+    def test_pages_fit_budget(self):
+        user = QueryBudgetTests.user
+        post = QueryBudgetTests.post
+        post_kwargs = {'username': user.username, 'post_id': post.id}
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group', kwargs={'slug': 'group0'}),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=тест',
+            reverse('posts:profile', kwargs={'username': user.username}),
+            reverse('posts:post', kwargs=post_kwargs),
+            reverse('posts:post_edit', kwargs=post_kwargs),
+            reverse('posts:add_comment', kwargs=post_kwargs),
+            reverse('posts:new_post'),
+            reverse('posts:profile_follow', args=['author0']),
+            reverse('posts:profile_unfollow', args=['author0']),
+            reverse('posts:404'),
+        )
+        for client in (self.guest_client, self.authorized_client):
+            for url in urls:
+                with self.subTest(url=url):
+                    client.get(url)
+
+    def test_forms_fit_budget(self):
+        post_kwargs = {
+            'username': QueryBudgetTests.user.username,
+            'post_id': QueryBudgetTests.post.id,
+        }
+        for url in (reverse('posts:new_post'),
+                    reverse('posts:post_edit', kwargs=post_kwargs),
+                    reverse('posts:add_comment', kwargs=post_kwargs)):
+            with self.subTest(url=url):
+                self.authorized_client.post(url, {'text': 'Новый текст'})
+
+    def test_budget_exceeded_reports_duplicates(self):
+        @query_budget(1)
+        def view(request):
+            for user in User.objects.all()[:3]:
+                Post.objects.filter(author=user).exists()
+            return HttpResponse()
+
+        with self.assertRaisesRegex(QueryBudgetExceeded, '3x SELECT'):
+            view(RequestFactory().get('/'))
+
+    def test_uncounted_queries_stay_out_of_budget(self):
+        @query_budget(1)
+        def view(request):
+            User.objects.exists()
+            with uncounted():
+                for user in User.objects.all()[:3]:
+                    Post.objects.filter(author=user).exists()
+            return HttpResponse()
+
+        view(RequestFactory().get('/'))
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.search import match_expression
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Котики',
+            slug='cats',
+            description='Группа про котиков',
+        )
+        cls.user = User.objects.create(username='hulk')
+        cls.post = Post.objects.create(
+            text='Кот спит на диване',
+            author=cls.user,
+            group=cls.group,
+        )
+        for number in range(12):
+            Post.objects.create(
+                text=f'Собака номер {number} гуляет',
+                author=cls.user,
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query, after=None):
+        data = {'q': query}
+        if after:
+            data['after'] = after
+        response = self.guest_client.get(reverse('posts:search'), data)
+        return response.context.get('posts'), response.context['next_cursor']
+
+    def test_search_finds_text_group_and_author(self):
+        for query in ('диване', 'Котики', 'HULK кот'):
+            with self.subTest(query=query):
+                posts, _ = self.found(query)
+                self.assertIn(SearchTests.post, posts,
+                              f'Поиск "{query}" не нашел пост')
+
+    def test_search_follows_edits(self):
+        post = Post.objects.get(pk=SearchTests.post.pk)
+        post.text = 'Кот ушел гулять'
+        post.save()
+        Group.objects.filter(pk=SearchTests.group.pk).update(title='Кошки')
+        self.assertEqual(self.found('диване')[0], [],
+                         'Поиск находит удаленный из текста пост')
+        self.assertEqual(self.found('кошки')[0], [post],
+                         'Поиск не видит новое название группы')
+
+    def test_search_keyset_pages(self):
+        first_page, cursor = self.found('собака')
+        self.assertEqual(len(first_page), 10,
+                         'Неверное количество постов на первой странице')
+        second_page, cursor = self.found('собака', cursor)
+        self.assertEqual(len(second_page), 2,
+                         'Неверное количество постов на второй странице')
+        self.assertIsNone(cursor, 'Лишняя ссылка на следующую страницу')
+        self.assertFalse(set(first_page) & set(second_page),
+                         'Страницы поиска пересекаются')
+
+    def test_search_query_syntax_is_escaped(self):
+        self.assertEqual(match_expression('кот" OR (NEAR'),
+                         '"кот" "OR" "NEAR"*')
+        posts, _ = self.found('"(*')
+        self.assertEqual(posts, [], 'Пустой запрос что-то нашел')
+
+    def test_rebuild_search_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_post_fts')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertIn(SearchTests.post, self.found('диване')[0],
+                      'Индекс не перестроен')
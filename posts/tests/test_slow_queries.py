@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, SlowQuery, User
+from posts.slow_queries import query_shape
+
+
+# Every query is slow.
+@override_settings(SLOW_QUERY_MS=0)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        Post.objects.create(text='Тестовая страница', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_query_shape(self):
+        self.assertEqual(
+            query_shape('SELECT  "id" FROM "posts_post"\n'
+                        'WHERE "id" IN (%s, %s, %s) LIMIT 10 OFFSET 20'),
+            'SELECT "id" FROM "posts_post" WHERE "id" IN (%s, ...) '
+            'LIMIT %s OFFSET %s',
+            'Неверно нормализован запрос',
+        )
+
+    def test_slow_queries_are_aggregated(self):
+        with self.assertLogs('posts.slow_queries', 'WARNING'):
+            self.guest_client.get(reverse('posts:index'))
+        first = {query.fingerprint: query.count
+                 for query in SlowQuery.objects.all()}
+        self.assertTrue(first, 'Медленные запросы не записаны')
+        cache.clear()
+        self.guest_client.get(reverse('posts:index'))
+        for query in SlowQuery.objects.filter(fingerprint__in=first):
+            self.assertEqual(query.count, first[query.fingerprint] * 2,
+                             'Запросы одного вида не суммируются')
+            self.assertEqual(query.view, 'posts:index',
+                             'Не записано представление')
+            self.assertGreaterEqual(query.max_time, 0)
+
+    def test_plan_and_template_line_are_captured(self):
+        # Feed pages are read in the view, the profile page in the template.
+        self.guest_client.get(reverse('posts:profile', args=['hulk']))
+        feed = SlowQuery.objects.filter(
+            sql__contains='FROM "posts_post"', template__gt='',
+        ).first()
+        self.assertIsNotNone(feed, 'Не записана строка шаблона')
+        self.assertRegex(feed.template, r'\.html:\d+$',
+                         'Неверная строка шаблона')
+        self.assertIn('posts_post', feed.plan, 'Не записан план запроса')
+        self.assertTrue(feed.location, 'Не записано место вызова')
+
+    def test_report_command(self):
+        self.guest_client.get(reverse('posts:index'))
+        output = StringIO()
+        call_command('slow_queries', top=1, clear=True, stdout=output)
+        self.assertIn('posts:index', output.getvalue(),
+                      'Отчет не содержит медленных запросов')
+        self.assertFalse(SlowQuery.objects.exists(), 'Отчет не очищен')
+
+    @override_settings(SLOW_QUERY_MS=None)
+    def test_disabled(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.assertFalse(SlowQuery.objects.exists(),
+                         'Выключенный журнал записывает запросы')
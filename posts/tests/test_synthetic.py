@@ -0,0 +1,60 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.groups import group_registry
+from posts.models import (Comment, Follow, Post, TimelineEntry, User,
+                          UserStats)
+
+
+class GenerateDataTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('generate_data', users=30, groups=3, follows=5,
+                     posts=200, comments=100, batch_size=50, seed=1,
+                     stdout=StringIO())
+
+    def test_generates_requested_amounts(self):
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists(), 'Подписки не созданы')
+        self.assertLess(
+            Post.objects.order_by('pub_date').first().pub_date,
+            timezone.now() - timedelta(days=1),
+            'Даты публикаций не распределены по времени'
+        )
+
+    def test_denormalized_data_is_consistent(self):
+        stats = UserStats.objects.aggregate(posts=Sum('posts_count'),
+                                            followers=Sum('followers_count'))
+        self.assertEqual(stats['posts'], Post.objects.count(),
+                         'Счетчики постов не совпадают')
+        self.assertEqual(stats['followers'], Follow.objects.count(),
+                         'Счетчики подписчиков не совпадают')
+        self.assertEqual(
+            Post.objects.aggregate(count=Sum('comments_count'))['count'],
+            Comment.objects.count(),
+            'Счетчики комментариев не совпадают'
+        )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(user=follow.user,
+                                             author=follow.author)
+                                     .values_list('post_id', flat=True)),
+            set(Post.objects.filter(author=follow.author)
+                            .values_list('pk', flat=True)),
+            'Лента подписчика не заполнена постами автора'
+        )
+
+    def test_new_groups_reach_the_registry(self):
+        self.assertIsNotNone(group_registry.get_by_slug('group-2'))
+        call_command('generate_data', users=1, groups=1, follows=0,
+                     posts=0, comments=0, stdout=StringIO())
+        self.assertIsNotNone(group_registry.get_by_slug('group-3'),
+                             'Новая группа не попала в реестр')
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.other = User.objects.create(username='thor')
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Группа')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', group=group,
+                                author=cls.user if number % 2 else cls.other)
+            for number in range(4)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, source, **context):
+        return Template('{% load post_tags %}' + source).render(
+            Context(context))
+
+    def test_post_cards_render_every_post(self):
+        with mock.patch('posts.templatetags.post_tags.get_post_version') \
+                as post_version:
+            html = self.render('{% post_cards posts %}', posts=self.posts,
+                               user=self.user)
+        post_version.assert_not_called()
+        for post in self.posts:
+            self.assertIn(post.text, html, 'Пост не выведен')
+        edit_links = html.count('Редактировать')
+        self.assertEqual(edit_links, 2,
+                         'Кнопка редактирования не только у своих постов')
+
+    def test_post_cards_match_single_card(self):
+        post = self.posts[0]
+        self.assertHTMLEqual(
+            self.render('{% post_cards posts %}', posts=[post]),
+            self.render('{% post_card post %}', post=post),
+            'Карточки в ленте и по одной различаются',
+        )
+
+    def test_post_cards_use_fresh_versions(self):
+        self.render('{% post_cards posts %}', posts=self.posts)
+        post = self.posts[0]
+        post.text = 'Исправленный пост'
+        post.save()
+        html = self.render('{% post_cards posts %}', posts=self.posts)
+        self.assertIn('Исправленный пост', html,
+                      'Карточка не обновилась после правки поста')
+        self.assertIn(reverse('posts:profile', args=[post.author.username]),
+                      html)
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+
+from posts.models import Post, User
+from posts.thumbnails import enqueue
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        image = (b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                 b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                 b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                 b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                 b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                 b'\x0A\x00\x3B')
+        cls.post = Post.objects.create(
+            text='Тестовая страница',
+            author=cls.user,
+            image=SimpleUploadedFile(
+                name='image.gif',
+                content=image,
+                content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        # sorl keeps its thumbnail registry in the cache as well.
+        cache.clear()
+
+    def thumbnails(self):
+        return [name for _, _, names in os.walk(MEDIA_ROOT)
+                for name in names if name != 'image.gif']
+
+    def test_generate_thumbnails_command_prepares_post_card(self):
+        call_command('generate_thumbnails', workers=0, stdout=StringIO())
+        thumbnails = self.thumbnails()
+        self.assertEqual(len(thumbnails), 1, 'Миниатюра не создана')
+        render_to_string('includes/post_item.html',
+                         {'post': ThumbnailsTests.post})
+        self.assertEqual(
+            self.thumbnails(),
+            thumbnails,
+            'Шаблон карточки поста создал другую миниатюру'
+        )
+
+    def test_enqueue_without_workers_generates_at_once(self):
+        enqueue(ThumbnailsTests.post)
+        self.assertEqual(len(self.thumbnails()), 1,
+                         'Миниатюра не создана до фиксации транзакции')
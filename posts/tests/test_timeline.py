@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Post, PullAuthor, TimelineEntry, User
+from posts.paginator import encode_cursor
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='hulk')
+        cls.reader = User.objects.create(username='reader')
+        cls.old_post = Post.objects.create(
+            text='Пост до подписки',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(TimelineTests.reader)
+
+    def feed_texts(self, query=''):
+        response = self.authorized_client.get(
+            reverse('posts:follow_index') + query
+        )
+        return [post.text for post in response.context.get('page')]
+
+    def test_timeline_backfill_on_follow_and_trim_on_unfollow(self):
+        Follow.objects.create(user=TimelineTests.reader,
+                              author=TimelineTests.author)
+        self.assertEqual(
+            self.feed_texts(),
+            ['Пост до подписки'],
+            'Старые посты автора не попали в ленту при подписке'
+        )
+        Follow.objects.filter(user=TimelineTests.reader).delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTests.reader).exists(),
+            'Посты автора остались в ленте после отписки'
+        )
+
+    def test_timeline_fan_out_on_new_post(self):
+        Follow.objects.create(user=TimelineTests.reader,
+                              author=TimelineTests.author)
+        Post.objects.create(text='Новый пост', author=TimelineTests.author)
+        self.assertEqual(
+            self.feed_texts(),
+            ['Новый пост', 'Пост до подписки'],
+            'Новый пост не попал в ленту подписчика'
+        )
+
+    def test_deleted_post_leaves_cached_feed(self):
+        cache.clear()
+        Follow.objects.create(user=TimelineTests.reader,
+                              author=TimelineTests.author)
+        post = Post.objects.create(text='Удаленный пост',
+                                   author=TimelineTests.author)
+        self.feed_texts()
+        post.delete()
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [post.text for post in response.context.get('page')],
+            ['Пост до подписки'],
+            'Удаленный пост остался в ленте'
+        )
+        self.assertEqual(response.context.get('paginator').count, 1,
+                         'Число постов ленты не обновилось после удаления')
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_timeline_pull_path_for_popular_author(self):
+        fan = User.objects.create(username='fan')
+        Follow.objects.create(user=fan, author=TimelineTests.author)
+        Follow.objects.create(user=TimelineTests.reader,
+                              author=TimelineTests.author)
+        post = Post.objects.create(text='Пост для всех',
+                                   author=TimelineTests.author)
+        self.assertTrue(
+            PullAuthor.objects.filter(author=TimelineTests.author).exists(),
+            'Популярный автор не переведен на чтение при запросе ленты'
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=post).exists(),
+            'Пост популярного автора разослан по лентам'
+        )
+        self.assertEqual(
+            self.feed_texts(),
+            ['Пост для всех', 'Пост до подписки'],
+            'Посты популярного автора не попали в ленту'
+        )
+        cursor = encode_cursor(TimelineTests.old_post)
+        self.assertEqual(
+            self.feed_texts(f'?after={cursor}'),
+            [],
+            'Лишние посты после курсора в ленте'
+        )
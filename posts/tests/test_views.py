@@ -73,26 +73,30 @@ class PostsViewsTests(TestCase):
             'Неверное количество постов на главной странице'
         )
 
-    def test_posts_idex_page_cache(self):
-        response_1 = self.guest_client.get(reverse('posts:index'))
-        Post.objects.create(
-                text='Тестовая страница ',
-                pub_date=dt.today,
-                author=PostsViewsTests.user,
-        )
-        response_2 = self.guest_client.get(reverse('posts:index'))
-        self.assertEqual(response_1.content,
-                         response_2.content,
-                         'Cache не работает')
-        Post.objects.create(
-                text='Тестовая страница ',
-                pub_date=dt.today,
-                author=PostsViewsTests.user,
-        )
-        response_3 = self.guest_client.get(reverse('posts:index') + '?page=2')
-        self.assertNotEqual(response_2.content,
-                            response_3.content,
-                            'Cache не работает, page 2')
+    def test_posts_index_page_post_fragment_cache(self):
+        post = Post.objects.get(pk=PostsViewsTests.post.pk)
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=post.pk).update(text='Текст мимо кеша')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Текст мимо кеша',
+                               msg_prefix='Cache не работает')
+        post.text = 'Новый текст'
+        post.save()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый текст',
+                            msg_prefix='Cache не сбрасывается после правки')
+
+    def test_posts_post_fragment_cache_shared_between_users(self):
+        edit_url = reverse('posts:post_edit', kwargs={
+            'username': PostsViewsTests.user.username,
+            'post_id': PostsViewsTests.post.id,
+        })
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, edit_url,
+                               msg_prefix='Гостю доступно редактирование')
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, edit_url,
+                            msg_prefix='Автору недоступно редактирование')
 
     def test_posts_group_page_post_is_in_right_group(self):
         slug = PostsViewsTests.group.slug
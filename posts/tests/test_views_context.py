@@ -9,6 +9,7 @@ from django.forms import fields
 from django.test import TestCase, Client, override_settings
 
 from posts.models import Post, Group, User
+from posts.thumbnails import enqueue
 
 MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -50,6 +51,8 @@ class PostsViewsTests(TestCase):
             group=cls.group,
             image=uploaded
         )
+        # As new_post does, the pages are not to render it themselves.
+        enqueue(cls.post)
 
     @classmethod
     def tearDownClass(cls):
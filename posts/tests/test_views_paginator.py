@@ -1,9 +1,14 @@
 from datetime import datetime as dt
 
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.urls import reverse
 from django.test import TestCase, Client
 
 from posts.models import Post, User
+from posts.paginator import (
+    MAX_PAGE_NUMBER, elided_page_range, encode_cursor,
+)
 
 
 class PaginatorViewsTest(TestCase):
@@ -20,6 +25,7 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_posts_first_page_contains_ten_records(self):
@@ -46,3 +52,88 @@ class PaginatorViewsTest(TestCase):
             'Тестовая страница 10',
             'Нверный контекст поста на второй странице'
         )
+
+    def test_posts_keyset_pages_follow_each_other(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        first_page = list(response.context.get('page'))
+        cursor = encode_cursor(first_page[-1])
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?after={cursor}'
+        )
+        page = response.context.get('page')
+        self.assertIsNone(
+            response.context.get('paginator'),
+            'В режиме курсора paginator не должен считать страницы'
+        )
+        self.assertEqual(
+            [post.text for post in page],
+            ['Тестовая страница 2',
+             'Тестовая страница 1',
+             'Тестовая страница 0'],
+            'Неверный контекст страницы после курсора'
+        )
+        self.assertFalse(page.has_next(), 'Лишняя следующая страница')
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?before={page.previous_cursor()}'
+        )
+        self.assertEqual(
+            list(response.context.get('page')),
+            first_page,
+            'Неверный контекст страницы перед курсором'
+        )
+
+    def test_posts_cursor_near_top_returns_full_first_page(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        first_page = list(response.context.get('page'))
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?before={encode_cursor(first_page[3])}'
+        )
+        page = response.context.get('page')
+        self.assertEqual(list(page), first_page,
+                         'Курсор у начала ленты дает неполную страницу')
+        self.assertFalse(page.has_previous(), 'Лишняя предыдущая страница')
+        self.assertTrue(page.has_next(), 'Нет следующей страницы')
+
+    def test_posts_invalid_cursor_returns_404(self):
+        response = self.guest_client.get(
+            reverse('posts:index') + '?after=not-a-cursor'
+        )
+        self.assertEqual(response.status_code, 404,
+                         'Неверный курсор должен возвращать 404')
+
+    def test_posts_deep_page_number_returns_404(self):
+        response = self.guest_client.get(
+            reverse('posts:index') + f'?page={MAX_PAGE_NUMBER + 1}'
+        )
+        self.assertEqual(response.status_code, 404,
+                         'Глубокие страницы доступны только по курсору')
+
+    def test_posts_page_range_is_windowed(self):
+        for post in range(100):
+            Post.objects.create(
+                text='Еще одна страница ' + str(post),
+                author=PaginatorViewsTest.user,
+            )
+        response = self.guest_client.get(reverse('posts:index') + '?page=6')
+        self.assertEqual(
+            response.context.get('page').page_range,
+            [1, '…', 4, 5, 6, 7, 8, '…', 12],
+            'Неверный диапазон номеров страниц в пагинаторе'
+        )
+        self.assertNotIn('?page=9"', response.content.decode(),
+                         'Пагинатор выводит страницы вне окна')
+
+    def test_posts_page_range_shows_single_skipped_page(self):
+        cases = (
+            (9, 5, [1, 2, 3, 4, 5, 6, 7, 8, 9]),
+            (10, 5, [1, 2, 3, 4, 5, 6, 7, '…', 10]),
+            (10, 6, [1, '…', 4, 5, 6, 7, 8, 9, 10]),
+        )
+        for num_pages, number, page_range in cases:
+            with self.subTest(num_pages=num_pages, number=number):
+                page = Paginator(range(num_pages), 1).page(number)
+                self.assertEqual(
+                    elided_page_range(page),
+                    page_range,
+                    'Многоточие заменяет одну страницу'
+                )
@@ -0,0 +1,87 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+from yatube.metrics import REGISTRY, THUMBNAIL_DURATION
+
+from .decorators import uncounted
+
+logger = logging.getLogger(__name__)
+
+# Must match the {% thumbnail %} call in includes/post_item.html, otherwise
+# the pre-generated thumbnail is not the one the template looks up.
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+_executor = None
+
+
+def init_worker():
+    django.setup()
+
+
+def create_executor(workers):
+    # Workers are spawned rather than forked: a forked child would inherit
+    # the parent's open SQLite connections and cursors.
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+    )
+
+
+def generate(name):
+    """Render the post card thumbnail of an image, return an error or None."""
+    started = time.perf_counter()
+    result = 'ok'
+    try:
+        get_thumbnail(name, GEOMETRY, **OPTIONS)
+    except Exception as error:
+        logger.exception('Не удалось создать миниатюру %s', name)
+        result = 'error'
+        return f'{name}: {error}'
+    finally:
+        THUMBNAIL_DURATION.observe(time.perf_counter() - started,
+                                   result=result)
+        # Pool workers serve no requests that would flush their metrics.
+        REGISTRY.flush(force=True)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = create_executor(settings.THUMBNAIL_WORKERS)
+
+    return _executor
+
+
+def _workers_share_database():
+    # Worker processes open their own connection, an in-memory database
+    # (e.g. the test one) would be empty for them.
+    is_in_memory_db = getattr(connection, 'is_in_memory_db', None)
+    return not (is_in_memory_db and is_in_memory_db())
+
+
+def enqueue(post):
+    """Generate the post's thumbnail off the request path.
+
+    The job is submitted once the transaction commits, so that workers see
+    the saved file. With `THUMBNAIL_WORKERS = 0` or an in-memory database
+    it runs in-process right away: this connection already sees the post,
+    and the thumbnail registry rows roll back with it. Its queries stay out
+    of the view's @query_budget, as they would in a worker.
+    """
+    if not post.image:
+        return
+    name = post.image.name
+    if settings.THUMBNAIL_WORKERS and _workers_share_database():
+        transaction.on_commit(lambda: get_executor().submit(generate, name))
+    else:
+        with uncounted():
+            generate(name)
@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.db import transaction
+
+from .cache import touch
+from .models import Follow, Post, PullAuthor, TimelineEntry
+from .paginator import POSTS_PER_PAGE, seek
+
+TIMELINE_KEY = ('pub_date', 'post_id')
+
+
+def _sort_key(post):
+    return post.pub_date, post.pk
+
+
+def _entries_to_posts(entries):
+    return [Post(pk=entry.post_id, pub_date=entry.pub_date)
+            for entry in entries]
+
+
+def fan_out(post):
+    """Push a freshly published post into the feeds of its followers."""
+    author_id = post.author_id
+    if PullAuthor.objects.filter(author_id=author_id).exists():
+        touch(f'pull:{author_id}')
+        return
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = list(
+        Follow.objects.filter(author_id=author_id)
+                      .values_list('user_id', flat=True)[:limit + 1]
+    )
+    if len(followers) > limit:
+        switch_to_pull(author_id)
+        return
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post.pk,
+                       author_id=author_id, pub_date=post.pub_date)
+         for user_id in followers],
+        batch_size=500,
+    )
+    touch(*(f'feed:{user_id}' for user_id in followers))
+
+
+def retract(post):
+    """Move the feeds that may still show a deleted post.
+
+    Its timeline entries go with it, the cached feed pages are rebuilt.
+    """
+    author_id = post.author_id
+    if PullAuthor.objects.filter(author_id=author_id).exists():
+        touch(f'pull:{author_id}')
+        return
+    followers = Follow.objects.filter(author_id=author_id)\
+                              .values_list('user_id', flat=True)
+    touch(*(f'feed:{user_id}' for user_id in followers))
+
+
+@transaction.atomic
+def switch_to_pull(author_id):
+    """Stop fanning out a popular author's posts.
+
+    Their already pushed entries are dropped, so that the pull path is the
+    only source of the author's posts and feeds never show duplicates.
+    """
+    PullAuthor.objects.get_or_create(author_id=author_id)
+    TimelineEntry.objects.filter(author_id=author_id).delete()
+
+
+def backfill(follow):
+    """Copy the latest posts of a newly followed author into the feed."""
+    if PullAuthor.objects.filter(author_id=follow.author_id).exists():
+        return
+    posts = Post.objects.filter(author_id=follow.author_id)\
+                        .order_by('-pub_date')\
+                        .values_list('pk', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=follow.user_id, post_id=pk,
+                       author_id=follow.author_id, pub_date=pub_date)
+         for pk, pub_date in posts[:settings.TIMELINE_BACKFILL_LIMIT]],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    touch(f'feed:{follow.user_id}')
+
+
+def trim(follow):
+    """Drop an unfollowed author's posts from the feed."""
+    TimelineEntry.objects.filter(user_id=follow.user_id,
+                                 author_id=follow.author_id).delete()
+    touch(f'feed:{follow.user_id}')
+
+
+class FollowFeed:
+    """Posts of the authors a user follows, newest first.
+
+    Reads the user's materialized timeline with an indexed range scan and
+    merges in the posts of followed `PullAuthor`s. Supports both the
+    numbered `Paginator` (`count()` and slicing) and keyset `seek()`.
+    Posts only have their ids and dates, see `posts.feeds.feed_page`.
+    """
+
+    def __init__(self, user):
+        self.entries = TimelineEntry.objects.filter(user=user)\
+                                            .only('post_id', 'pub_date')
+        self.pull_authors = list(
+            PullAuthor.objects.filter(author__following__user=user)
+                              .values_list('author_id', flat=True)
+        )
+        self.pulled = Post.objects.filter(author_id__in=self.pull_authors)\
+                                  .only('pk', 'pub_date')
+        self.scopes = [f'feed:{user.pk}'] + [
+            f'pull:{author_id}' for author_id in self.pull_authors
+        ]
+
+    def count(self):
+        count = self.entries.count()
+        if self.pull_authors:
+            count += self.pulled.count()
+        return count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        entries = self.entries.order_by('-pub_date', '-post_id')
+        if not self.pull_authors:
+            return _entries_to_posts(entries[index])
+        # Both sources have to be read up to the end of the slice to merge.
+        stop = index.stop
+        posts = _entries_to_posts(entries[:stop]) \
+            + list(self.pulled.order_by('-pub_date', '-pk')[:stop])
+        posts.sort(key=_sort_key, reverse=True)
+        return posts[index.start:stop]
+
+    def seek(self, cursor=None, newer=False, limit=POSTS_PER_PAGE):
+        posts = _entries_to_posts(seek(self.entries, cursor, newer, limit,
+                                       key=TIMELINE_KEY))
+        if self.pull_authors:
+            posts += seek(self.pulled, cursor, newer, limit)
+            posts.sort(key=_sort_key, reverse=not newer)
+
+        return posts[:limit]
@@ -1,20 +1,32 @@
-from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count
+from django.db import transaction
 from django.urls.base import reverse
 
-from .models import Follow, Group, Post, User
+from yatube.db import replica_reads
+
+from .counters import user_stats
+from .models import Follow, Post, User
+from .decorators import (
+    anonymous_page_cache, query_budget, watermark_condition,
+)
+from .feeds import feed_page
 from .forms import PostForm, CommentForm
+from .groups import group_registry
+from .paginator import paginate
+from .search import search_posts
+from .thumbnails import enqueue as enqueue_thumbnail
+from .timeline import FollowFeed
 
 
+@query_budget(6)
+@watermark_condition('posts')
+@anonymous_page_cache('posts')
+@replica_reads
 def index(request):
-    post_list = Post.objects.annotate(comments_count=Count('comments'))\
-                            .order_by('-pub_date')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    paginator, page = feed_page(request, Post.objects.all(), 'index',
+                                'posts')
     context = {
         'page': page,
         'paginator': paginator,
@@ -23,13 +35,17 @@ def index(request):
     return render(request, 'index.html', context)
 
 
+@query_budget(6)
+@watermark_condition('group:{slug}')
+@anonymous_page_cache('group:{slug}')
+@replica_reads
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.annotate(comments_count=Count('comments'))\
-                           .order_by('-pub_date')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = group_registry.get_by_slug(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    # Not group.posts: it would set post.group, reading deferred group_id.
+    paginator, page = feed_page(request, Post.objects.filter(group=group),
+                                f'group:{group.pk}', f'group:{slug}')
     context = {
         'group': group,
         'paginator': paginator,
@@ -39,25 +55,45 @@ def group_posts(request, slug):
     return render(request, 'group.html', context)
 
 
+@query_budget(5)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts, next_cursor = search_posts(query, after=request.GET.get('after'))
+    context = {
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+
+    return render(request, 'search.html', context)
+
+
+@query_budget(10)
 @login_required
+@transaction.atomic
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        enqueue_thumbnail(post)
 
         return HttpResponseRedirect(reverse('posts:index'))
 
     return render(request, 'posts/post_new.html', {'form': form})
 
 
+@query_budget(7)
+@watermark_condition('profile:{username}')
+@anonymous_page_cache('profile:{username}')
+@replica_reads
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    stats = user_stats(author)
+    post_list = author.posts.select_related('author')
+    paginator, page = paginate(request, post_list)
     following = False
     if request.user.is_authenticated:
         following = author.following.filter(user=request.user).exists()
@@ -65,22 +101,32 @@ def profile(request, username):
         'page': page,
         'paginator': paginator,
         'author': author,
-        'post_count': paginator.count,
+        'stats': stats,
+        'post_count': stats.posts_count,
         'following': following,
     }
 
     return render(request, 'profile.html', context)
 
 
+@query_budget(6)
+@watermark_condition('post:{post_id}', 'profile:{username}')
+@anonymous_page_cache('post:{post_id}', 'profile:{username}')
+@replica_reads
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
-    post_count = post.author.posts.count()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats'),
+        pk=post_id,
+        author__username=username,
+    )
+    stats = user_stats(post.author)
     form = CommentForm()
     comments = post.comments.select_related('author')
     context = {
         'author': post.author,
         'post': post,
-        'post_count': post_count,
+        'stats': stats,
+        'post_count': stats.posts_count,
         'form': form,
         'comments': comments,
     }
@@ -88,18 +134,22 @@ def post_view(request, username, post_id):
     return render(request, 'posts/post.html', context)
 
 
+@query_budget(8)
 @login_required
 def post_edit(request, username, post_id):
     if request.user.username != username:
         return redirect('posts:post', username=username, post_id=post_id)
 
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             pk=post_id, author__username=username)
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post)
     if form.is_valid():
         post = form.save(commit=False)
         post.save()
+        if 'image' in form.changed_data:
+            enqueue_thumbnail(post)
 
         return HttpResponseRedirect(
             reverse('posts:post',
@@ -113,10 +163,13 @@ def post_edit(request, username, post_id):
     )
 
 
+@query_budget(8)
 @login_required
+@transaction.atomic
 def add_comment(request, username, post_id):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             pk=post_id, author__username=username)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.post = post
@@ -131,14 +184,13 @@ def add_comment(request, username, post_id):
     return render(request, 'posts/post_new.html', {'form': form})
 
 
+@query_budget(8)
+@replica_reads
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)\
-                            .annotate(comments_count=Count('comments'))\
-                            .order_by('-pub_date')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    feed = FollowFeed(request.user)
+    paginator, page = feed_page(request, feed, f'follow:{request.user.pk}',
+                                *feed.scopes)
     context = {
         'page': page,
         'paginator': paginator,
@@ -147,7 +199,9 @@ def follow_index(request):
     return render(request, 'follow.html', context)
 
 
+@query_budget(13)
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = User.objects.get(username=username)
     if author == request.user:
@@ -157,7 +211,9 @@ def profile_follow(request, username):
     return redirect('posts:profile', username=username)
 
 
+@query_budget(14)
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = User.objects.get(username=username)
     if author == request.user:
@@ -167,6 +223,7 @@ def profile_unfollow(request, username):
     return redirect('posts:profile', username=username)
 
 
+@query_budget(4)
 def page_not_found(request, exception):
     return render(
         request,
@@ -176,5 +233,6 @@ def page_not_found(request, exception):
     )
 
 
+@query_budget(4)
 def server_error(request):
     return render(request, 'misc/500.html', status=500)
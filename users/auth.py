@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model,
+    load_backend,
+)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from posts.cache import get_versions
+
+
+def _user_key(pk):
+    # The user's version is bumped on every save and delete, so a changed
+    # password or profile is never read from a stale entry.
+    return f'auth:user:{pk}:{get_versions(("user", pk))}'
+
+
+def get_user(request):
+    """`django.contrib.auth.get_user` reading the user from the cache."""
+    try:
+        pk = get_user_model()._meta.pk.to_python(request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    key = _user_key(pk)
+    cached = cache.get(key)
+    if cached is None:
+        user = load_backend(backend_path).get_user(pk)
+        if user is None:
+            return AnonymousUser()
+        # The password hash stays out of the shared cache: the field is
+        # deferred and read from the database only where a view uses it.
+        auth_hash = user.get_session_auth_hash()
+        del user.__dict__['password']
+        cache.set(key, (user, auth_hash), settings.USER_CACHE_TIMEOUT)
+    else:
+        user, auth_hash = cached
+    # Sessions started before a password change are logged out as usual.
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(session_hash, auth_hash)):
+        request.session.flush()
+        return AnonymousUser()
+
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """Authenticate without querying the user on every request."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            # Reading the empty session would only add `Vary: Cookie`.
+            request.user = AnonymousUser()
+            return
+        request.user = SimpleLazyObject(lambda: get_user(request))
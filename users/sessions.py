@@ -0,0 +1,28 @@
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    """Cached database sessions that skip saves changing nothing.
+
+    A session marked modified is written to the database and the cache
+    only if its data differs from what was loaded or last saved.
+    """
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._saved = None
+
+    def _serialize(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._saved = self._serialize(data)
+        return data
+
+    def save(self, must_create=False):
+        data = self._serialize(self._get_session(no_load=must_create))
+        if not must_create and data == self._saved:
+            return
+        super().save(must_create)
+        self._saved = data
@@ -0,0 +1,97 @@
+import pickle
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from posts.models import User
+from users.auth import _user_key
+from users.sessions import SessionStore
+
+
+class CachedAuthTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='hulk', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.user.refresh_from_db()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def request_user(self):
+        response = self.authorized_client.get(reverse('posts:index'))
+        return response.context['user']
+
+    def test_session_and_user_are_not_queried(self):
+        self.request_user()
+        with CaptureQueriesContext(connection) as queries:
+            user = self.request_user()
+        self.assertEqual(user, self.user)
+        tables = [query['sql'] for query in queries
+                  if 'FROM "django_session"' in query['sql']
+                  or 'FROM "auth_user"' in query['sql']]
+        self.assertEqual(tables, [],
+                         'Сессия или пользователь читаются из базы')
+
+    def test_profile_change_is_seen(self):
+        self.request_user()
+        self.user.first_name = 'Брюс'
+        self.user.save()
+        self.assertEqual(self.request_user().first_name, 'Брюс',
+                         'Пользователь не обновился в кеше')
+
+    def test_password_change_logs_out(self):
+        self.request_user()
+        self.user.set_password('new password')
+        self.user.save()
+        self.assertFalse(self.request_user().is_authenticated,
+                         'Сессия пережила смену пароля')
+
+    def test_password_hash_is_not_cached(self):
+        self.request_user()
+        cached = pickle.dumps(cache.get(_user_key(self.user.pk)))
+        self.assertNotIn(self.user.password.encode(), cached,
+                         'Хеш пароля сохранен в кеше')
+
+    def test_password_change_form_checks_old_password(self):
+        self.request_user()
+        response = self.authorized_client.post(
+            reverse('password_change'),
+            {'old_password': 'pass', 'new_password1': 'Hu1k-smash!',
+             'new_password2': 'Hu1k-smash!'},
+        )
+        self.assertEqual(response.status_code, 302,
+                         'Старый пароль не принят')
+        self.assertTrue(self.request_user().is_authenticated,
+                        'Сменивший пароль пользователь разлогинен')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('Hu1k-smash!'),
+                        'Пароль не изменен')
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        session = SessionStore()
+        session['theme'] = 'dark'
+        session.create()
+        self.session_key = session.session_key
+
+    def test_unchanged_session_is_not_saved(self):
+        session = SessionStore(self.session_key)
+        session['theme'] = 'dark'
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_session_is_saved(self):
+        session = SessionStore(self.session_key)
+        session['theme'] = 'light'
+        session.save()
+        cache.clear()
+        self.assertEqual(SessionStore(self.session_key)['theme'], 'light',
+                         'Измененная сессия не сохранена')
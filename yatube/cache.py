@@ -0,0 +1,273 @@
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+'''
+
+NOT_EXPIRED = '(expires IS NULL OR expires > ?)'
+
+
+class SQLiteCache(BaseCache):
+    """Cache shared by all processes of a host through one SQLite file.
+
+    LOCATION is the path of the file. The database runs in WAL mode with
+    the file memory-mapped, so reads from different processes do not block
+    each other. Entries over MAX_ENTRIES are evicted least recently used
+    first, `incr` is atomic across processes. Integers are stored as is,
+    anything else is pickled. Counting the entries costs a scan of the
+    table, so only about one write in CULL_EVERY checks the limit, which
+    may be overrun by that many entries in between.
+
+    OPTIONS besides the BaseCache ones:
+    TOUCH_INTERVAL -- seconds between updates of an entry's access time,
+        reads only write when it is older than that (default 1);
+    MMAP_SIZE -- bytes of the file to memory-map (default 256 MiB);
+    BUSY_TIMEOUT -- seconds to wait for another process' write (default 5);
+    CULL_EVERY -- average number of writes per cull (default 100).
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = os.path.abspath(location)
+        options = params.get('OPTIONS', {})
+        self._touch_interval = float(options.get('TOUCH_INTERVAL', 1))
+        self._mmap_size = int(options.get('MMAP_SIZE', 256 * 1024 * 1024))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        # One connection per thread, and a new one after a fork: SQLite
+        # connections must not be carried into a child process.
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.connection = self._connect()
+            local.pid = os.getpid()
+
+        return local.connection
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        connection = sqlite3.connect(
+            self._path,
+            timeout=self._busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+        connection.execute(f'PRAGMA mmap_size = {self._mmap_size}')
+        connection.executescript(SCHEMA)
+
+        return connection
+
+    def _write(self):
+        return _Transaction(self._connection)
+
+    def _encode(self, value):
+        # SQLite integers are 64-bit, larger ones are pickled like the rest.
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _touch(self, keys, now):
+        # Access times are a hint for eviction: skipped rather than wait
+        # for another process' write, never fail a read.
+        connection = self._connection
+        connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            with self._write() as cursor:
+                cursor.executemany(
+                    'UPDATE cache SET accessed = ? WHERE key = ?',
+                    [(now, key) for key in keys],
+                )
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute(
+                f'PRAGMA busy_timeout = {int(self._busy_timeout * 1000)}')
+
+    def _read(self, keys):
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection.execute(
+            f'SELECT key, value, accessed FROM cache '
+            f'WHERE key IN ({placeholders}) AND {NOT_EXPIRED}',
+            [*keys, now],
+        ).fetchall()
+        stale = [key for key, _, accessed in rows
+                 if accessed < now - self._touch_interval]
+        if stale:
+            self._touch(stale, now)
+
+        return {key: self._decode(value) for key, value, _ in rows}
+
+    def _store(self, cursor, key, value, timeout, now):
+        cursor.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+            'VALUES (?, ?, ?, ?)',
+            (key, self._encode(value), self._expires(timeout), now),
+        )
+
+    def _cull(self, cursor, now):
+        if random.random() * self._cull_every >= 1:
+            return
+        cursor.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        count = cursor.execute('SELECT count(*) FROM cache').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            cursor.execute('DELETE FROM cache')
+            return
+        # At least back to MAX_ENTRIES, writes since the last cull may
+        # have gone further over it than a CULL_FREQUENCY share.
+        cursor.execute(
+            'DELETE FROM cache WHERE key IN '
+            '(SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (max(count // self._cull_frequency, count - self._max_entries),),
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._read([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        found = self._read(list(keys))
+
+        return {keys[key]: value for key, value in found.items()}
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._connection.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {NOT_EXPIRED}',
+            (key, time.time()),
+        ).fetchone()
+
+        return row is not None
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as cursor:
+            self._store(cursor, key, value, timeout, now)
+            self._cull(cursor, now)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self._write() as cursor:
+            for key, value in data.items():
+                self._store(cursor, self._key(key, version), value,
+                            timeout, now)
+            self._cull(cursor, now)
+
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as cursor:
+            cursor.execute(
+                'DELETE FROM cache WHERE key = ? AND NOT ' + NOT_EXPIRED,
+                (key, now),
+            )
+            cursor.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                (key, self._encode(value), self._expires(timeout), now),
+            )
+            added = cursor.rowcount == 1
+            if added:
+                self._cull(cursor, now)
+
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as cursor:
+            cursor.execute(
+                f'UPDATE cache SET expires = ?, accessed = ? '
+                f'WHERE key = ? AND {NOT_EXPIRED}',
+                (self._expires(timeout), now, key, now),
+            )
+            return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as cursor:
+            cursor.execute(
+                f'UPDATE cache SET value = value + ?, accessed = ? '
+                f'WHERE key = ? AND {NOT_EXPIRED} '
+                f"AND typeof(value) = 'integer'",
+                (delta, now, key, now),
+            )
+            if cursor.rowcount != 1:
+                raise ValueError(f"Key '{key}' not found")
+            return cursor.execute(
+                'SELECT value FROM cache WHERE key = ?', (key,),
+            ).fetchone()[0]
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        with self._write() as cursor:
+            cursor.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._write() as cursor:
+            cursor.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        with self._write() as cursor:
+            cursor.execute('DELETE FROM cache')
+
+
+class _Transaction:
+    """`BEGIN IMMEDIATE` block: takes the write lock up front, so that
+    read-modify-write sequences such as `incr` are atomic."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection.cursor()
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.connection.execute('COMMIT')
+        else:
+            self.connection.execute('ROLLBACK')
@@ -0,0 +1,119 @@
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_state = threading.local()
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite' and settings.SQLITE_PRAGMAS:
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+
+
+class ReplicaRouter:
+    """Read from a replica inside `replica_reads` views, write to default.
+
+    Every other read goes to the primary as well, so views that are not
+    known to tolerate replication lag never see it.
+    """
+
+    def db_for_read(self, model, **hints):
+        return getattr(_state, 'replica', None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, schema included.
+        return db not in settings.DATABASE_REPLICAS
+
+
+def _is_sticky(request):
+    return settings.REPLICA_STICKY_COOKIE in request.COOKIES
+
+
+def _synced_key(alias):
+    return f'replica:synced:{alias}'
+
+
+def mark_synced(alias, started):
+    """Record that the replica holds every write committed by `started`."""
+    cache.set(_synced_key(alias), started, None)
+
+
+def synced_replicas():
+    """Return `{alias: time}` of the replicas copied at least once.
+
+    The time is the start of the last copy, see `sync_replicas`. Replicas
+    never copied have no tables yet and are not read from.
+    """
+    keys = {_synced_key(alias): alias
+            for alias in settings.DATABASE_REPLICAS}
+    if not keys:
+        return {}
+
+    return {keys[key]: started
+            for key, started in cache.get_many(list(keys)).items()}
+
+
+def replica_reads(view):
+    """Serve the read-only view from a random synced `DATABASE_REPLICAS` alias.
+
+    Visitors who wrote something in the last `REPLICA_STICKY_SECONDS`
+    keep reading from the primary, so they see their own writes.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or _is_sticky(request):
+            return view(request, *args, **kwargs)
+        replicas = list(synced_replicas())
+        if not replicas:
+            return view(request, *args, **kwargs)
+        _state.replica = random.choice(replicas)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.replica = None
+
+    return wrapper
+
+
+class ReplicaStickinessMiddleware:
+    """Pin visitors to the primary for a while after any write.
+
+    The cookie is set with no replicas as well: cached feed pages are not
+    served stale to its holders either, see `posts.feeds.feed_page`. Must
+    come before SessionMiddleware, so that saving the session counts as a
+    write too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.wrote = False
+        response = self.get_response(request)
+        if _state.wrote:
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+            )
+
+        return response
@@ -0,0 +1,306 @@
+import fcntl
+import glob
+import json
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# Sum of the files of exited processes, see Registry.collect().
+ARCHIVE = 'archive.json'
+
+
+class Metric:
+    """Values of one metric by label values, kept in this process."""
+    kind = None
+
+    def __init__(self, name, description, labels, lock):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = lock
+
+    def _key(self, labels):
+        return json.dumps([str(labels[label]) for label in self.labels])
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(total, values):
+        return (total or 0) + values
+
+    def samples(self, labels, value):
+        yield self.name + '_total', labels, value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels, lock,
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels, lock)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        with self._lock:
+            # Per bucket counts (the last one is +Inf), then the sum.
+            counts = self.values.setdefault(
+                key, [0] * (len(self.buckets) + 2))
+            counts[index] += 1
+            counts[-1] += value
+
+    @staticmethod
+    def merge(total, values):
+        if total is None:
+            return list(values)
+        return [left + right for left, right in zip(total, values)]
+
+    def samples(self, labels, counts):
+        cumulative = 0
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            yield self.name + '_bucket', labels + [('le', bound)], cumulative
+        yield self.name + '_sum', labels, counts[-1]
+        yield self.name + '_count', labels, cumulative
+
+
+class Registry:
+    """Metrics of all worker processes.
+
+    Every process keeps its own values in memory and writes them to its
+    own file in METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds.
+    The exposition sums the files of all processes, past ones included,
+    so counters keep growing when workers are restarted: the files of
+    exited processes are merged into ARCHIVE and removed. Without
+    METRICS_DIR only this process' values are exposed.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._flushed = 0.0
+        self._name = None
+        os.register_at_fork(after_in_child=self._forked)
+
+    def counter(self, name, description, labels=()):
+        return self._register(Counter(name, description, labels, self._lock))
+
+    def histogram(self, name, description, labels=(), **kwargs):
+        return self._register(
+            Histogram(name, description, labels, self._lock, **kwargs))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def _forked(self):
+        # The values so far are the parent's, and so may be its lock.
+        self._lock = threading.Lock()
+        for metric in self.metrics.values():
+            metric._lock = self._lock
+        self.clear()
+        self._name = None
+
+    @property
+    def path(self):
+        if self._name is None:
+            # Unique even if the pid is reused after a restart.
+            self._name = f'{os.getpid()}-{time.time_ns()}.json'
+        return os.path.join(settings.METRICS_DIR, self._name)
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.values = {}
+
+    def _snapshot(self):
+        with self._lock:
+            return json.dumps({name: metric.values
+                               for name, metric in self.metrics.items()})
+
+    def flush(self, force=False):
+        if settings.METRICS_DIR is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        path = self.path
+        snapshot = self._snapshot()
+        self._flushed = now
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        _write(path, snapshot)
+
+    def collect(self):
+        """Sum the values of all processes, this one flushed first."""
+        if settings.METRICS_DIR is None:
+            return self._merge([json.loads(self._snapshot())])
+        self.flush(force=True)
+        lock_path = os.path.join(settings.METRICS_DIR, '.lock')
+        with open(lock_path, 'w') as lock:
+            # One collector at a time, or two could archive the same file.
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            paths = glob.glob(os.path.join(settings.METRICS_DIR, '*.json'))
+            dead = [path for path in paths if not _is_alive(path)]
+            if dead:
+                archive = os.path.join(settings.METRICS_DIR, ARCHIVE)
+                paths = [path for path in paths
+                         if path != archive and path not in dead]
+                # Values of metrics this version no longer has are dropped.
+                _write(archive, json.dumps(
+                    self._merge(self._snapshots([archive, *dead]))))
+                for path in dead:
+                    os.remove(path)
+                paths.append(archive)
+
+            return self._merge(self._snapshots(paths))
+
+    def _merge(self, snapshots):
+        totals = {name: {} for name in self.metrics}
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in values.items():
+                    totals[name][key] = metric.merge(
+                        totals[name].get(key), value)
+
+        return totals
+
+    @staticmethod
+    def _snapshots(paths):
+        for path in paths:
+            try:
+                with open(path) as source:
+                    yield json.load(source)
+            except (OSError, ValueError):
+                # Written by an older version or removed meanwhile.
+                continue
+
+    def render(self):
+        """Format all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.description}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(values.items()):
+                labels = list(zip(metric.labels, json.loads(key)))
+                for sample, sample_labels, number in metric.samples(labels,
+                                                                    value):
+                    lines.append(f'{sample}{_labels(sample_labels)} {number}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _write(path, text):
+    temporary = f'{path}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w') as output:
+        output.write(text)
+    os.replace(temporary, path)
+
+
+def _is_alive(path):
+    # Files are named by Registry.path, the archive belongs to no process.
+    match = re.match(r'(\d+)-\d+\.json$', os.path.basename(path))
+    if match is None:
+        return True
+    try:
+        os.kill(int(match.group(1)), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(value)}"' for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')\
+                .replace('\n', '\\n')
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'yatube_request_duration_seconds', 'Request latency by URL name.',
+    labels=['view'],
+)
+DB_DURATION = REGISTRY.histogram(
+    'yatube_db_duration_seconds', 'Database time per request by URL name.',
+    labels=['view'],
+)
+DB_QUERIES = REGISTRY.histogram(
+    'yatube_db_queries', 'Database queries per request by URL name.',
+    labels=['view'], buckets=QUERY_BUCKETS,
+)
+FRAGMENT_CACHE = REGISTRY.counter(
+    'yatube_fragment_cache_requests',
+    'Template fragment cache lookups by fragment name and result.',
+    labels=['fragment', 'result'],
+)
+THUMBNAIL_DURATION = REGISTRY.histogram(
+    'yatube_thumbnail_duration_seconds',
+    'Post card thumbnail generation time by result.',
+    labels=['result'],
+)
+
+
+def observe_request(request, timings, duration):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unresolved'
+    REQUEST_DURATION.observe(duration, view=view)
+    DB_DURATION.observe(timings.db_time, view=view)
+    DB_QUERIES.observe(timings.queries, view=view)
+    for (fragment, result), count in timings.fragments.items():
+        FRAGMENT_CACHE.inc(count, fragment=fragment, result=result)
+    REGISTRY.flush()
+
+
+def _has_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics_view(request):
+    """Prometheus scrape target for staff and for METRICS_TOKEN holders."""
+    if not _has_token(request):
+        return staff_member_required(_render)(request)
+    return _render(request)
+
+
+def _render(request):
+    return HttpResponse(REGISTRY.render(),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,178 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import Template
+
+from . import metrics
+
+# Prefix of the keys {% cache %} stores template fragments under.
+FRAGMENT_PREFIX = 'template.cache.'
+
+_local = threading.local()
+_missing = object()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.cache_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Fragment cache lookups by (fragment name, 'hit' or 'miss').
+        self.fragments = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def cache_lookup(self, key, hit):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+        if isinstance(key, str) and key.startswith(FRAGMENT_PREFIX):
+            fragment = key[len(FRAGMENT_PREFIX):].split('.')[0]
+            self.fragments[fragment, 'hit' if hit else 'miss'] += 1
+
+    def header(self, total):
+        metrics = [
+            ('db', self.db_time, f'{self.queries} queries'),
+            ('tpl', self.template_time, 'templates'),
+            ('cache', self.cache_time,
+             f'hit {self.cache_hits} / miss {self.cache_misses}'),
+            ('total', total, None),
+        ]
+        return ', '.join(
+            f'{name};dur={seconds * 1000:.1f}'
+            + (f';desc="{description}"' if description else '')
+            for name, seconds, description in metrics
+        )
+
+
+def _timings():
+    return getattr(_local, 'timings', None)
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        timings = _timings()
+        if timings is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timings.template_time += time.perf_counter() - started
+
+    wrapper.timed = True
+    return wrapper
+
+
+def _timed_get(get):
+    def wrapper(key, default=None, version=None):
+        timings = _timings()
+        if timings is None:
+            return get(key, default=default, version=version)
+        started = time.perf_counter()
+        value = get(key, default=_missing, version=version)
+        timings.cache_time += time.perf_counter() - started
+        timings.cache_lookup(key, value is not _missing)
+        return default if value is _missing else value
+
+    return wrapper
+
+
+def _timed_get_many(get_many):
+    def wrapper(keys, version=None):
+        timings = _timings()
+        if timings is None:
+            return get_many(keys, version=version)
+        keys = list(keys)
+        started = time.perf_counter()
+        found = get_many(keys, version=version)
+        timings.cache_time += time.perf_counter() - started
+        for key in keys:
+            timings.cache_lookup(key, key in found)
+        return found
+
+    return wrapper
+
+
+def _instrument_caches():
+    # Cache backends are created per thread, wrap each instance once.
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        if not getattr(backend, '_timed', False):
+            backend.get = _timed_get(backend.get)
+            backend.get_many = _timed_get_many(backend.get_many)
+            backend._timed = True
+
+
+class ServerTimingMiddleware:
+    """Report where a request spent its time in a `Server-Timing` header.
+
+    Covers database queries, template rendering (queries run while
+    rendering count in both), cache reads with their hits and misses, and
+    the whole request. `PROFILING_SAMPLE_RATE` of the requests also run
+    under cProfile; the profile of a sampled request slower than
+    `PROFILING_SLOW_MS` is dumped to `PROFILING_DIR`. The same timings
+    go to the metrics registry, by URL name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if not getattr(Template.render, 'timed', False):
+            Template.render = _timed_render(Template.render)
+
+    def __call__(self, request):
+        _instrument_caches()
+        timings = _local.timings = RequestTimings()
+        profiler = None
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timings))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _local.timings = None
+        total = time.perf_counter() - started
+        response['Server-Timing'] = timings.header(total)
+        metrics.observe_request(request, timings, total)
+        slow = total * 1000 >= settings.PROFILING_SLOW_MS
+        if profiler is not None and slow:
+            self.dump(profiler, request, total)
+
+        return response
+
+    def dump(self, profiler, request, total):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path = re.sub(r'[^\w-]+', '_', request.path).strip('_') or 'root'
+        name = (f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-'
+                f'{request.method}-{path}-{total * 1000:.0f}ms.prof')
+        profiler.dump_stats(os.path.join(settings.PROFILING_DIR, name))
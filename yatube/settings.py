@@ -40,12 +40,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.staticfiles.StaticFilesMiddleware',
+    'posts.slow_queries.SlowQueryMiddleware',
+    'yatube.profiling.ServerTimingMiddleware',
+    'yatube.db.ReplicaStickinessMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,6 +84,24 @@ DATABASES = {
     }
 }
 
+# PRAGMA statements run on every new SQLite connection, see yatube/db.py.
+
+SQLITE_PRAGMAS = {}
+
+# Read-only copies of 'default' the @replica_reads views read from once
+# `sync_replicas` has copied them. After a write the visitor gets a cookie
+# that keeps them on the primary for REPLICA_STICKY_SECONDS, which should be
+# longer than the interval `sync_replicas` runs at. It is set without
+# replicas too, its holders are never shown a stale feed page.
+
+DATABASE_ROUTERS = ['yatube.db.ReplicaRouter']
+
+DATABASE_REPLICAS = []
+
+REPLICA_STICKY_COOKIE = 'primary'
+
+REPLICA_STICKY_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -119,12 +141,57 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
 
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
+# StaticFilesMiddleware serves STATIC_ROOT and MEDIA_ROOT itself. Hashed
+# static files are cached forever, the rest for *_MAX_AGE seconds.
+
+SERVE_STATIC = False
+
+STATIC_MAX_AGE = 3600
+
+MEDIA_MAX_AGE = 86400
+
+
+# Sessions and logged in users are read from the cache, see users/.
+
+SESSION_ENGINE = 'users.sessions'
+
+USER_CACHE_TIMEOUT = 3600
+
+
+# Public pages of visitors without cookies are served whole from the cache
+# until a write touches what they show, see posts/decorators.py.
+
+PAGE_CACHE_SECONDS = 300
+
+
+# Ids of feed pages are cached for FEED_CACHE_SECONDS or until a write, see
+# posts.cache.fetch(). One process rebuilds a page, holding a lock for at
+# most FEED_CACHE_LOCK_SECONDS, while the others keep serving the previous
+# one for up to FEED_CACHE_STALE_SECONDS. FEED_CACHE_BETA > 1 rebuilds
+# pages earlier before they expire, 0 turns early rebuilds off.
+
+FEED_CACHE_SECONDS = 20
+
+FEED_CACHE_STALE_SECONDS = 60
+
+FEED_CACHE_LOCK_SECONDS = 10
+
+FEED_CACHE_BETA = 1.0
+
+# Posts, their authors and groups are read from the cache by id and version,
+# see posts.cache.get_objects().
+
+OBJECT_CACHE_TIMEOUT = 86400
+
+
 LOGIN_URL = '/auth/login/'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -135,3 +202,59 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+
+# Follow feed: posts of authors with more followers than the fan-out limit
+# are pulled at read time instead of being pushed into every timeline.
+
+TIMELINE_FANOUT_LIMIT = 5000
+
+TIMELINE_BACKFILL_LIMIT = 1000
+
+
+# Processes generating post thumbnails off the request path after commit.
+# With 0, or an in-memory database the workers cannot open, they are
+# generated in the request process right away, see posts.thumbnails.enqueue.
+
+THUMBNAIL_WORKERS = 2
+
+
+# Views going over their @query_budget raise instead of logging a warning.
+# Always on in tests, see TEST_RUNNER.
+
+QUERY_BUDGET_STRICT = False
+
+TEST_RUNNER = 'yatube.test_runner.TestRunner'
+
+
+# Every response gets a Server-Timing header. This fraction of requests is
+# also run under cProfile, profiles of the ones slower than PROFILING_SLOW_MS
+# are saved to PROFILING_DIR.
+
+PROFILING_SAMPLE_RATE = 0
+
+PROFILING_SLOW_MS = 500
+
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+
+# Request, database, fragment cache and thumbnail metrics for Prometheus at
+# /administrator/metrics/, open to staff and to `Authorization: Bearer
+# METRICS_TOKEN`. With METRICS_DIR set every worker process writes its
+# metrics there at most every METRICS_FLUSH_INTERVAL seconds and the page
+# sums them, without it the page shows the serving process only.
+
+METRICS_DIR = None
+
+METRICS_FLUSH_INTERVAL = 5
+
+METRICS_TOKEN = None
+
+
+# Queries taking SLOW_QUERY_MS or longer are logged with their plan and summed
+# up by shape in the admin and the slow_queries command. Shapes not seen for
+# SLOW_QUERY_WINDOW_DAYS drop out. None turns the log off.
+
+SLOW_QUERY_MS = 100
+
+SLOW_QUERY_WINDOW_DAYS = 7
@@ -0,0 +1,64 @@
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+DEBUG = False
+
+
+# WAL lets readers go on while a request writes, NORMAL sync is safe with
+# WAL, up to 256 MiB of the file is memory-mapped and each connection caches
+# 64 MiB of pages. Connections are kept, so the pragmas and the page cache
+# outlive a request.
+
+DATABASES['default']['CONN_MAX_AGE'] = 600
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# No replicas by default. One is added to DATABASES and DATABASE_REPLICAS
+# with 'TEST': {'MIRROR': 'default'}, filled by `manage.py sync_replicas`
+# after migrate and refreshed by running it again, see the README.
+
+
+# Shared by all worker processes of the host, so a fragment rendered by one
+# of them is a hit for the others and invalidation reaches every process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+}
+
+
+# Profile one request in a hundred, keep the profiles of the slow ones.
+
+PROFILING_SAMPLE_RATE = 0.01
+
+
+# Sum the metrics of all worker processes, let the scraper in with the token
+# from the environment.
+
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+# Static files are collected with hashed names and gzip and brotli copies
+# (python manage.py collectstatic) and served together with the media files
+# by the application itself.
+
+STATICFILES_STORAGE = 'yatube.staticfiles.CompressedManifestStaticFilesStorage'
+
+SERVE_STATIC = True
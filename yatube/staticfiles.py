@@ -0,0 +1,236 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.txt', '.html', '.json',
+                '.xml', '.ico', '.eot', '.otf', '.ttf')
+
+# Precompressed variants by Content-Encoding, preferred first.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _compress(data):
+    yield '.gz', gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(data)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed file names plus gzip and brotli copies of text files.
+
+    Brotli copies are made only when the `brotli` package is installed.
+    A copy is kept if it saves at least 5% of the size.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            names[name] = None
+            if hashed_name:
+                names[hashed_name] = None
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in names:
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        for suffix, compressed in _compress(data):
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as output:
+                    output.write(compressed)
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for item in header.split(','):
+        coding, *parameters = item.split(';')
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _byte_range(header, size):
+    """Return `(start, end)` of a single range, None for the whole file.
+
+    Raises ValueError for a range outside of the file.
+    """
+    match = _RANGE.match(header.strip())
+    if match is None:
+        # Several ranges or other units, send the whole file.
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+class StaticFilesMiddleware:
+    """Serve STATIC_ROOT and MEDIA_ROOT without a separate web server.
+
+    Picks the brotli or gzip copy collectstatic made when the client
+    accepts it, answers conditional and single Range requests and marks
+    hashed static files immutable. Other files may be cached for
+    STATIC_MAX_AGE or MEDIA_MAX_AGE seconds. On with SERVE_STATIC.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.roots = [
+            (settings.STATIC_URL, settings.STATIC_ROOT,
+             settings.STATIC_MAX_AGE),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT,
+             settings.MEDIA_MAX_AGE),
+        ]
+        self.immutable = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            for url, root, max_age in self.roots:
+                if root and request.path.startswith(url):
+                    response = self.serve(
+                        request, root, request.path[len(url):], max_age,
+                        static=url == settings.STATIC_URL,
+                    )
+                    if response is not None:
+                        return response
+
+        return self.get_response(request)
+
+    def serve(self, request, root, name, max_age, static):
+        try:
+            path = safe_join(root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        compressible = path.endswith(COMPRESSIBLE)
+        encoding = None
+        # Ranges are served from the file itself.
+        if compressible and 'HTTP_RANGE' not in request.META:
+            accepted = _accepted_encodings(
+                request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            for coding, suffix in ENCODINGS:
+                if coding in accepted and os.path.isfile(path + suffix):
+                    encoding, path = coding, path + suffix
+                    break
+        stat = os.stat(path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+        if static and name in self.immutable:
+            cache_control = IMMUTABLE
+        else:
+            cache_control = f'public, max-age={max_age}'
+        headers = {
+            'Cache-Control': cache_control,
+            'ETag': etag,
+            'Last-Modified': http_date(stat.st_mtime),
+            'Accept-Ranges': 'bytes',
+        }
+        if compressible:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            not_modified = etag in if_none_match or if_none_match == '*'
+        else:
+            not_modified = not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime)
+        if not_modified:
+            return self.with_headers(HttpResponseNotModified(), headers)
+
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if 'HTTP_RANGE' in request.META and if_range in (
+                None, etag, headers['Last-Modified']):
+            try:
+                byte_range = _byte_range(request.META['HTTP_RANGE'],
+                                         stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return self.with_headers(response, headers)
+
+        if byte_range is None:
+            response = FileResponse(open(path, 'rb'))
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(_read(path, start, length),
+                                             status=206)
+            response['Content-Length'] = str(length)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        # Of the file asked for, FileResponse would guess it from the copy.
+        response['Content-Type'] = content_type
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+
+        return self.with_headers(response, headers)
+
+    @staticmethod
+    def with_headers(response, headers):
+        for header, value in headers.items():
+            response[header] = value
+        return response
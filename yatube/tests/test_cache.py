@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from yatube.cache import SQLiteCache
+
+
+def create_cache(directory, **options):
+    return SQLiteCache(os.path.join(directory, 'cache.sqlite3'),
+                       {'OPTIONS': options})
+
+
+def increment(directory, times):
+    cache = create_cache(directory)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = create_cache(self.directory, MAX_ENTRIES=10,
+                                  CULL_FREQUENCY=2, CULL_EVERY=1,
+                                  TOUCH_INTERVAL=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_get_set_delete(self):
+        cache = self.cache
+        cache.set('post', {'text': 'Тестовая страница'})
+        cache.set_many({'version': 7, 'title': 'Группа'})
+        self.assertEqual(cache.get('post'), {'text': 'Тестовая страница'})
+        self.assertEqual(cache.get_many(['version', 'title', 'missing']),
+                         {'version': 7, 'title': 'Группа'})
+        self.assertFalse(cache.add('version', 8),
+                         'add перезаписал существующий ключ')
+        cache.delete('post')
+        self.assertIsNone(cache.get('post'), 'Ключ не удален')
+
+    def test_expired_entries_are_missing(self):
+        self.cache.set('post', 'Текст', timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('post'), 'Истекший ключ отдается')
+        self.assertTrue(self.cache.add('post', 'Новый текст'),
+                        'add не заменил истекший ключ')
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 5), 6)
+        self.assertEqual(self.cache.decr('counter'), 5)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_least_recently_used_are_evicted(self):
+        for number in range(10):
+            self.cache.set(f'key{number}', number)
+            time.sleep(0.001)
+        self.cache.get('key0')
+        self.cache.set('key10', 10)
+        self.assertEqual(self.cache.get('key0'), 0,
+                         'Вытеснен недавно прочитанный ключ')
+        self.assertIsNone(self.cache.get('key1'),
+                          'Не вытеснен самый старый ключ')
+
+    def test_most_writes_do_not_cull(self):
+        cache = create_cache(self.directory, MAX_ENTRIES=10, CULL_EVERY=100)
+        with mock.patch('yatube.cache.random.random', return_value=0.5):
+            for number in range(20):
+                cache.set(f'key{number}', number)
+        self.assertEqual(len(cache.get_many(f'key{number}'
+                                            for number in range(20))), 20,
+                         'Запись без проверки лимита вытеснила ключи')
+        with mock.patch('yatube.cache.random.random', return_value=0.001):
+            cache.set('key20', 20)
+        self.assertLessEqual(len(cache.get_many(f'key{number}'
+                                                for number in range(21))), 10,
+                             'Лимит не проверен')
+
+    def test_reads_do_not_wait_for_writers(self):
+        cache = create_cache(self.directory, BUSY_TIMEOUT=2,
+                             TOUCH_INTERVAL=0)
+        cache.set('post', 'Текст')
+        writer = create_cache(self.directory)._connection
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            started = time.monotonic()
+            self.assertEqual(cache.get('post'), 'Текст')
+            self.assertLess(time.monotonic() - started, 1,
+                            'Чтение ждет чужую запись')
+        finally:
+            writer.execute('ROLLBACK')
+        self.assertEqual(
+            cache._connection.execute('PRAGMA busy_timeout').fetchone()[0],
+            2000, 'Записи перестали ждать чужую запись',
+        )
+
+    def test_shared_between_processes(self):
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=increment,
+                                     args=(self.directory, 50))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), 200,
+                         'incr не атомарен между процессами')
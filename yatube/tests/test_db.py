@@ -0,0 +1,110 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+
+from posts.cache import get_watermarks, is_settled, touch
+from posts.models import Post, User
+from yatube.db import (ReplicaStickinessMiddleware, mark_synced,
+                       replica_reads, synced_replicas)
+
+
+class SQLitePragmasTests(SimpleTestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_pragmas_are_applied_to_new_connections(self):
+        new_connection = connection.copy()
+        self.addCleanup(new_connection.close)
+        with new_connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -1234,
+                             'PRAGMA не применены к соединению')
+
+
+@replica_reads
+def read_view(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        mark_synced('replica', time.time())
+        self.factory = RequestFactory()
+
+    def test_read_views_use_replica(self):
+        response = read_view(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica',
+                         'Чтение не направлено в реплику')
+        self.assertEqual(router.db_for_read(Post), 'default',
+                         'Реплика используется вне страницы')
+
+    def test_replica_never_copied_is_not_read(self):
+        cache.clear()
+        response = read_view(self.factory.get('/'))
+        self.assertEqual(response.content, b'default',
+                         'Чтение направлено в нескопированную реплику')
+
+    def test_settled_only_after_copy_of_the_write(self):
+        touch('posts')
+        watermarks = get_watermarks('posts')
+        self.assertFalse(is_settled(watermarks),
+                         'Реплика без последней записи считается свежей')
+        mark_synced('replica', time.time() + 1)
+        self.assertTrue(is_settled(watermarks),
+                        'Скопированная реплика считается устаревшей')
+
+    def test_writers_stick_to_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_STICKY_COOKIE] = '1'
+        for request in (request, self.factory.post('/')):
+            with self.subTest(method=request.method):
+                self.assertEqual(read_view(request).content, b'default',
+                                 'Автор изменений читает из реплики')
+        self.assertEqual(router.db_for_write(Post), 'default',
+                         'Запись направлена не в основную базу')
+
+    def test_write_sets_sticky_cookie(self):
+        def write(request):
+            User.objects.create(username='hulk')
+            return HttpResponse()
+
+        middleware = ReplicaStickinessMiddleware(write)
+        response = middleware(self.factory.get('/'))
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies,
+                      'После записи не выставлена кука основной базы')
+        middleware = ReplicaStickinessMiddleware(read_view)
+        response = middleware(self.factory.get('/'))
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies,
+                         'Кука основной базы выставлена без записи')
+
+
+class SyncReplicasTests(TransactionTestCase):
+    # A backup waits for open transactions of the source connection.
+    def test_sync_replicas_copies_database(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        name = os.path.join(directory, 'replica.sqlite3')
+        user = User.objects.create(username='hulk')
+        Post.objects.create(text='Тестовая страница', author=user)
+        databases = {**settings.DATABASES, 'replica': {'NAME': name}}
+        with override_settings(DATABASES=databases,
+                               DATABASE_REPLICAS=['replica']):
+            call_command('sync_replicas', stdout=StringIO())
+            self.assertIn('replica', synced_replicas(),
+                          'Время копирования реплики не записано')
+        replica = sqlite3.connect(name)
+        self.addCleanup(replica.close)
+        count = replica.execute(
+            f'SELECT count(*) FROM {Post._meta.db_table}').fetchone()[0]
+        self.assertEqual(count, 1, 'Реплика не содержит постов')
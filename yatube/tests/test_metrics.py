@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from yatube.metrics import ARCHIVE, REGISTRY, REQUEST_DURATION
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+def observe_in_worker():
+    REQUEST_DURATION.observe(0.3, view='posts:index')
+    REGISTRY.flush(force=True)
+
+
+@override_settings(METRICS_DIR=METRICS_DIR, METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        cls.staff = User.objects.create(username='fury', is_staff=True)
+        Post.objects.create(text='Тестовая страница', author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        REGISTRY.clear()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def metrics(self):
+        response = self.staff_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200,
+                         'Метрики недоступны администратору')
+        return response.content.decode()
+
+    def sample(self, text, name, labels):
+        match = re.search(
+            rf'^{name}{{{re.escape(labels)}}} (\S+)$', text, re.M,
+        )
+        self.assertIsNotNone(match, f'Нет метрики {name}{{{labels}}}')
+        return float(match.group(1))
+
+    def test_metrics_are_for_staff_only(self):
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        for client in (self.guest_client, authorized_client):
+            response = client.get(reverse('metrics'))
+            self.assertEqual(response.status_code, 302,
+                             'Метрики доступны не администратору')
+        response = self.guest_client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret',
+        )
+        self.assertEqual(response.status_code, 200,
+                         'Метрики недоступны по токену')
+
+    def test_request_and_fragment_metrics(self):
+        self.guest_client.get(reverse('posts:index'))
+        # Another URL, the same page of cards is rendered again instead of
+        # being served from the anonymous page cache.
+        self.guest_client.get(reverse('posts:index') + '?page=1')
+        text = self.metrics()
+        self.assertEqual(
+            self.sample(text, 'yatube_request_duration_seconds_count',
+                        'view="posts:index"'),
+            2, 'Неверное число запросов к главной странице',
+        )
+        self.assertEqual(
+            self.sample(text, 'yatube_request_duration_seconds_bucket',
+                        'view="posts:index",le="+Inf"'),
+            2, 'Гистограмма задержек не накопительная',
+        )
+        self.assertGreater(
+            self.sample(text, 'yatube_db_queries_sum', 'view="posts:index"'),
+            0, 'Не учтены запросы к базе',
+        )
+        for result in ('hit', 'miss'):
+            self.assertEqual(
+                self.sample(text, 'yatube_fragment_cache_requests_total',
+                            f'fragment="post_item",result="{result}"'),
+                1, 'Неверная статистика кеша карточек',
+            )
+
+    def test_metrics_of_worker_processes_are_summed(self):
+        REQUEST_DURATION.observe(0.1, view='posts:index')
+        worker = multiprocessing.get_context('fork').Process(
+            target=observe_in_worker,
+        )
+        worker.start()
+        worker.join()
+        text = self.metrics()
+        self.assertEqual(
+            self.sample(text, 'yatube_request_duration_seconds_count',
+                        'view="posts:index"'),
+            2, 'Метрики процессов не суммируются',
+        )
+        self.assertAlmostEqual(
+            self.sample(text, 'yatube_request_duration_seconds_sum',
+                        'view="posts:index"'),
+            0.4, msg='Метрики процессов не суммируются',
+        )
+
+    def test_files_of_exited_processes_are_archived(self):
+        worker = multiprocessing.get_context('fork').Process(
+            target=observe_in_worker,
+        )
+        worker.start()
+        worker.join()
+        for _ in range(2):
+            text = self.metrics()
+            self.assertEqual(
+                self.sample(text, 'yatube_request_duration_seconds_count',
+                            'view="posts:index"'),
+                1, 'Метрики завершенного процесса потеряны или удвоены',
+            )
+        self.assertEqual(
+            sorted(name for name in os.listdir(METRICS_DIR)
+                   if name.endswith('.json')),
+            sorted([ARCHIVE, os.path.basename(REGISTRY.path)]),
+            'Файл завершенного процесса не удален',
+        )
@@ -0,0 +1,69 @@
+import os
+import re
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+PROFILING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR)
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='hulk')
+        Post.objects.create(text='Тестовая страница', author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PROFILING_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def metrics(self, response):
+        return dict(
+            metric.split(';', 1)
+            for metric in response['Server-Timing'].split(', ')
+        )
+
+    def cache_counts(self, metrics):
+        hits, misses = re.search(r'hit (\d+) / miss (\d+)',
+                                 metrics['cache']).groups()
+        return int(hits), int(misses)
+
+    def test_server_timing_header(self):
+        metrics = self.metrics(self.guest_client.get(reverse('posts:index')))
+        self.assertEqual(set(metrics), {'db', 'tpl', 'cache', 'total'},
+                         'Неверный набор метрик Server-Timing')
+        # Count, page ids, then the post and its author for the cold cache.
+        self.assertIn('desc="4 queries"', metrics['db'],
+                      'Неверное количество запросов к базе')
+        cold_hits, cold_misses = self.cache_counts(metrics)
+        self.assertGreater(cold_misses, 0, 'Не учтены промахи пустого кеша')
+        # Another URL, so the page is rendered rather than served whole.
+        metrics = self.metrics(
+            self.guest_client.get(reverse('posts:index') + '?page=1'))
+        hits, misses = self.cache_counts(metrics)
+        self.assertGreater(hits, cold_hits, 'Не учтены попадания в кеш')
+        self.assertLess(misses, cold_misses, 'Промахи в заполненном кеше')
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_MS=0)
+    def test_slow_sampled_request_is_dumped(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(len(os.listdir(PROFILING_DIR)), 1,
+                         'Профиль медленного запроса не сохранен')
+
+    @override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_MS=10 ** 6)
+    def test_fast_request_is_not_dumped(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(os.listdir(PROFILING_DIR), [],
+                         'Сохранен профиль быстрого запроса')
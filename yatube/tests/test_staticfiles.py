@@ -0,0 +1,112 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponseNotFound
+from django.test import TestCase, Client, RequestFactory, override_settings
+
+from yatube.staticfiles import StaticFilesMiddleware
+
+SOURCE_DIR = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+MEDIA_ROOT = tempfile.mkdtemp()
+STYLE = b'body { background: url("dot.png"); }\n' * 100
+
+
+@override_settings(
+    STATICFILES_DIRS=[SOURCE_DIR],
+    STATIC_ROOT=STATIC_ROOT,
+    MEDIA_ROOT=MEDIA_ROOT,
+    STATICFILES_STORAGE=(
+        'yatube.staticfiles.CompressedManifestStaticFilesStorage'
+    ),
+    SERVE_STATIC=True,
+)
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(SOURCE_DIR, 'site.css'), 'wb') as output:
+            output.write(STYLE)
+        with open(os.path.join(SOURCE_DIR, 'dot.png'), 'wb') as output:
+            output.write(b'\x89PNG' + bytes(range(256)))
+        with open(os.path.join(MEDIA_ROOT, 'photo.jpg'), 'wb') as output:
+            output.write(b'\xff\xd8' + bytes(100))
+
+    @classmethod
+    def tearDownClass(cls):
+        for directory in (SOURCE_DIR, STATIC_ROOT, MEDIA_ROOT):
+            shutil.rmtree(directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.client = Client()
+        self.style = staticfiles_storage.stored_name('site.css')
+
+    def get(self, path, **headers):
+        response = self.client.get(path, **headers)
+        return response, b''.join(response.streaming_content)
+
+    def test_collectstatic_hashes_and_compresses(self):
+        self.assertNotEqual(self.style, 'site.css',
+                            'Имя файла не содержит хеш')
+        with gzip.open(staticfiles_storage.path(self.style) + '.gz') as file:
+            self.assertIn(b'url("dot.', file.read(),
+                          'Сжатая копия не совпадает с файлом')
+        self.assertFalse(
+            os.path.exists(staticfiles_storage.path('dot.png') + '.gz'),
+            'Сжаты несжимаемые файлы',
+        )
+
+    def test_precompressed_copy_is_served(self):
+        response, content = self.get(f'/static/{self.style}',
+                                     HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip',
+                         'Не отдана сжатая копия')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'],
+                      'Файл с хешем не кешируется навсегда')
+        self.assertIn(b'url("dot.', gzip.decompress(content))
+        response, content = self.get(f'/static/{self.style}',
+                                     HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'),
+                         'Сжатая копия отдана без поддержки клиентом')
+
+    def test_unhashed_name_is_not_immutable(self):
+        response, _ = self.get('/static/site.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600',
+                         'Файл без хеша кешируется навсегда')
+
+    def test_range_requests(self):
+        response, content = self.get('/media/photo.jpg',
+                                     HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(content, b'\xff\xd8' + bytes(8))
+        self.assertEqual(response['Content-Range'], 'bytes 0-9/102')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=86400')
+        response, content = self.get('/media/photo.jpg',
+                                     HTTP_RANGE='bytes=-2')
+        self.assertEqual(content, bytes(2), 'Неверный суффиксный диапазон')
+        response = self.client.get('/media/photo.jpg',
+                                   HTTP_RANGE='bytes=500-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */102')
+
+    def test_conditional_request(self):
+        response, _ = self.get('/media/photo.jpg')
+        response = self.client.get('/media/photo.jpg',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_files(self):
+        middleware = StaticFilesMiddleware(
+            lambda request: HttpResponseNotFound())
+        for path in ('/static/missing.css', '/media/../manage.py'):
+            response = middleware(RequestFactory().get(path))
+            self.assertEqual(response.status_code, 404,
+                             f'{path} не должен отдаваться')
@@ -4,9 +4,12 @@ from django.contrib import admin
 from django.urls import include, path
 from django.conf.urls import handler404, handler500
 
+from .metrics import metrics_view
+
 handler404 = "posts.views.page_not_found"  # noqa
 handler500 = "posts.views.server_error"  # noqa
 urlpatterns = [
+    path('administrator/metrics/', metrics_view, name='metrics'),
     path('administrator/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),